@@ -0,0 +1,56 @@
+# bench/startup.py
+# Cold-start time of the assistant: fresh interpreters import main and load the
+# config, i.e. everything before the microphone opens.
+#   python bench/startup.py --runs 10 --imports
+import os, sys, json, argparse, statistics, subprocess
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import main
+main.load_config()
+ready = time.perf_counter() - t0
+heavy = ["pyttsx3", "spotipy", "requests", "wikipedia", "speech_recognition"]
+print(json.dumps({"ready_s": ready, "loaded": [m for m in heavy if m in sys.modules]}))
+"""
+
+def run_once() -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=SRC, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def slowest_imports(n: int = 10):
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=SRC,
+                         capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        if name.strip() not in ("main", "site"):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+def main():
+    ap = argparse.ArgumentParser(description="voiceAgent start-up time")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--imports", action="store_true", help="also list the slowest imports")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    times = [r["ready_s"] * 1000 for r in runs]
+    report = {"runs": args.runs, "median_ms": statistics.median(times), "min_ms": min(times),
+              "max_ms": max(times), "loaded_at_start": runs[-1]["loaded"]}
+    if args.imports:
+        report["slowest_imports_ms"] = {name: us / 1000 for us, name in slowest_imports()}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"ready in {report['median_ms']:.1f} ms median "
+          f"({report['min_ms']:.1f}-{report['max_ms']:.1f}, {args.runs} runs)")
+    print(f"heavy modules loaded at start: {', '.join(report['loaded_at_start']) or 'none'}")
+    for name, ms in report.get("slowest_imports_ms", {}).items():
+        print(f"  {ms:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
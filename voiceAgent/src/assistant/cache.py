@@ -0,0 +1,162 @@
+# src/assistant/cache.py
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from assistant import net
+
+log = logging.getLogger(__name__)
+CACHE_DIR = os.getenv("VOICE_AGENT_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "voice-agent"))
+
+def normalize(key: str) -> str:
+    return " ".join(key.lower().split())
+
+class LRUCache:
+    """Small thread-safe in-memory LRU keyed by normalized string."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        key = normalize(key)
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._data[normalize(key)] = value
+            self._data.move_to_end(normalize(key))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+class DiskCache:
+    """Persistent JSON-backed dict with no expiry; loaded on first use, written atomically.
+
+    With `max_entries` the oldest entries are dropped once the file grows past it.
+    Writes happen in the background (write-behind): set() updates memory and returns,
+    and bursts of sets coalesce into one file write. Pending writes are flushed at exit.
+    """
+
+    def __init__(self, name: str, directory: str | None = None, max_entries: int | None = None):
+        self.path = os.path.join(directory or CACHE_DIR, f"{name}.json")
+        self.max_entries = max_entries
+        self._data: dict | None = None
+        self._dirty = self._scheduled = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # one file write at a time
+        _disk_caches.add(self)
+
+    def _load(self) -> dict:
+        if self._data is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, key: str):
+        with self._lock:
+            return self._load().get(normalize(key))
+
+    def set(self, key: str, value):
+        self.set_many({key: value})
+
+    def set_many(self, items: dict):
+        with self._lock:
+            data = self._load()
+            for key, value in items.items():
+                data.pop(normalize(key), None)  # re-insert: newest last
+                data[normalize(key)] = value
+            if self.max_entries is not None:
+                for old in list(data)[:max(0, len(data) - self.max_entries)]:
+                    del data[old]
+            self._dirty = True
+            schedule, self._scheduled = not self._scheduled, True
+        if schedule:
+            net.submit(self.flush)
+
+    def flush(self):
+        """Write pending changes to disk now."""
+        with self._write_lock:
+            with self._lock:
+                self._scheduled = False
+                if not self._dirty:
+                    return
+                self._dirty = False
+                data = dict(self._data)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.path)
+            except OSError:
+                log.warning("Could not write cache %s", self.path)
+
+
+_disk_caches: "weakref.WeakSet[DiskCache]" = weakref.WeakSet()
+
+
+@atexit.register
+def flush_all():
+    """Write every DiskCache's pending changes (background writes may be cancelled at exit)."""
+    for cache in list(_disk_caches):
+        cache.flush()
+
+
+class TTLCache:
+    """In-memory cache with stale-while-revalidate.
+
+    Fresh for `ttl` seconds. For `stale_ttl` seconds after that the old value is
+    returned immediately while one background refresh runs; after that the caller fetches.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: dict = {}  # key -> (fetched_at, value)
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def _refresh(self, key, fetch):
+        try:
+            value = fetch()
+            with self._lock:
+                self._data[key] = (time.monotonic(), value)
+        except Exception:
+            log.warning("Background refresh failed for %s", key)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_or_fetch(self, key: str, fetch):
+        key = normalize(key)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age < self.ttl:
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl:
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        net.submit(self._refresh, key, fetch)
+                    return entry[1]
+        value = fetch()
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -2,69 +2,122 @@
 import logging
 from datetime import datetime
 from assistant.speech import speak
-from assistant import services
+from assistant import notes, services
+from assistant.registry import Registry
 
 log = logging.getLogger(__name__)
 ACTIVATION = "okay"
 
-HELP_TEXT = f"""
-Available commands (prefix with '{ACTIVATION}'):
-- say <words>        → Speak back your words
-- wikipedia <topic>  → Summary from Wikipedia
-- compute <query>    → Wolfram|Alpha compute (fallback Wikipedia)
-- play <song/artist> → Play on Spotify
-- weather <city>     → Current weather
-- notes <text>       → Save a note to file
-- help               → List commands
-- exit               → Quit the assistant
-"""
+registry = Registry()
+command = registry.command
 
-def handle_command(words: list[str], config: dict, sp=None):
-    if not words:
+
+@command("say", usage="<words>", help="Speak back your words")
+def say(rest, config, sp=None):
+    speak(rest or "Hello.")
+
+
+@command("wikipedia", usage="<topic>", help="Summary from Wikipedia")
+def wikipedia(rest, config, sp=None):
+    speak(services.search_wikipedia(rest))
+
+
+@command("compute", aliases=("computer",), usage="<query>", help="Wolfram|Alpha compute (fallback Wikipedia)")
+def compute(rest, config, sp=None):
+    # speculative: Wikipedia fallback races Wolfram instead of waiting for it
+    result = services.search_wolframalpha(
+        rest, config["WOLFRAM_APP_ID"], speculative=config.get("SPECULATIVE_COMPUTE", True)
+    )
+    speak(result)
+
+
+@command("play", usage="<song/artist>", help="Play on Spotify")
+def play(rest, config, sp=None):
+    speak(services.search_and_play_spotify(sp, rest))
+
+
+@command("weather", usage="<city>", help="Current weather")
+def weather(rest, config, sp=None):
+    speak(services.search_openweather(rest, config["OPENWEATHER_API_KEY"]))
+
+
+@command("notes", usage="<text>", help="Save a note")
+def save_note(rest, config, sp=None):
+    if not rest:
+        speak("What should the note say?")
         return
+    notes.JOURNAL.add(rest)
+    speak("Note written.")
 
-    if words[0] == ACTIVATION:
-        words = words[1:]
 
-    if not words:
-        speak("Please say a command.")
+def _read_notes(found):
+    for note in found:
+        day = datetime.fromtimestamp(note["ts"]).strftime("%B %d")
+        speak(f"On {day}: {note['text']}")
+
+
+@command("recall", usage="<words>", help="Find notes containing those words")
+def recall(rest, config, sp=None):
+    found = notes.JOURNAL.search(rest) if rest else []
+    if not found:
+        speak("I found no matching notes.")
+        return
+    _read_notes(found)
+
+
+@command("read", help="Read back your latest notes")
+def read_notes(rest, config, sp=None):
+    found = notes.JOURNAL.latest()
+    if not found:
+        speak("You have no notes yet.")
         return
+    _read_notes(found)
 
-    cmd = words[0]
-    rest = " ".join(words[1:]).strip()
 
-    if cmd == "say":
-        speak(rest or "Hello.")
+@command("help", help="List commands", immediate=True)
+def show_help(rest, config, sp=None):
+    print(registry.help_text(ACTIVATION))
+    speak("I printed the list of available commands.")
 
-    elif cmd == "wikipedia":
-        speak(services.search_wikipedia(rest))
 
-    elif cmd in ("compute", "computer"):
-        result = services.search_wolframalpha(rest, config["WOLFRAM_APP_ID"])
-        speak(result)
+@command("exit", help="Quit the assistant", immediate=True)
+def exit_assistant(rest, config, sp=None):
+    speak("Goodbye.")
+    raise SystemExit
 
-    elif cmd == "play":
-        result = services.search_and_play_spotify(sp, rest)
-        speak(result)
 
-    elif cmd == "weather":
-        result = services.search_openweather(rest, config["OPENWEATHER_API_KEY"])
-        speak(result)
+def on_partial(words: list[str]) -> bool:
+    """Inspect a partial hypothesis while the user is still speaking.
 
-    elif cmd == "notes":
-        speak("Ready to record your note.")
-        now = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-        with open(f"note_{now}.txt", "w") as f:
-            f.write(rest)
-        speak("Note written.")
+    Returns True if the command can be dispatched right away; otherwise warms up
+    the connection the named lookup will need.
+    """
+    if len(words) < 2 or words[0] != ACTIVATION:
+        return False
+    cmd = registry.resolve(words[1])
+    if cmd is None:
+        return False
+    if cmd.immediate:
+        return len(words) == 2
+    services.prewarm(cmd.name)
+    return False
 
-    elif cmd == "help":
-        print(HELP_TEXT.strip())
-        speak("I printed the list of available commands.")
 
-    elif cmd == "exit":
-        speak("Goodbye.")
-        raise SystemExit
+def handle_command(words: list[str], config: dict, sp=None):
+    if not words:
+        return
 
-    else:
-        speak("Unknown command.")
\ No newline at end of file
+    activated = words[0] == ACTIVATION
+    if activated:
+        words = words[1:]
+
+    if not words:
+        speak("Please say a command.")
+        return
+
+    # without the activation word this may just be conversation: exact verbs only
+    cmd = registry.resolve(words[0], approximate=activated)
+    if cmd is None:
+        speak("Unknown command.")
+        return
+    cmd(" ".join(words[1:]).strip(), config, sp=sp)
@@ -0,0 +1,78 @@
+# src/assistant/net.py
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+from concurrent.futures import Future, ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+HTTP_TIMEOUT = 10
+POOL_HOSTS = 8          # hosts with a kept-alive connection pool
+POOL_PER_HOST = 4       # max open connections per host (extra requests wait)
+MAX_WORKERS = 8         # concurrent lookups via submit()
+USER_AGENT = "voice-agent-assistant/0.1 (+https://github.com/pyolastro/python-mini-projects)"
+
+PREWARM_INTERVAL = 30   # seconds between warm-ups of the same host
+
+_session = None
+_executor = None
+_warmed: dict = {}
+_lock = threading.Lock()
+
+def session() -> "requests.Session":
+    """Shared keep-alive session, so back-to-back commands reuse TCP/TLS connections."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                # requests is imported with the first lookup, keeping start-up fast
+                import requests
+                from requests.adapters import HTTPAdapter
+                s = requests.Session()
+                # Wikimedia APIs reject anonymous generic user agents
+                s.headers["User-Agent"] = USER_AGENT
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST, pool_block=True)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                _session = s
+    return _session
+
+def get(url: str, params: dict | None = None, timeout: float = HTTP_TIMEOUT, **kwargs) -> "requests.Response":
+    return session().get(url, params=params, timeout=timeout, **kwargs)
+
+def submit(fn, *args, **kwargs) -> Future:
+    """Run an independent lookup in the background; returns a Future."""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="net")
+    return _executor.submit(fn, *args, **kwargs)
+
+def prewarm(url: str):
+    """Open (or refresh) a pooled connection to url's host in the background."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}/"
+    now = time.monotonic()
+    with _lock:
+        if now - _warmed.get(origin, -PREWARM_INTERVAL) < PREWARM_INTERVAL:
+            return
+        _warmed[origin] = now
+
+    def warm():
+        try:
+            session().head(origin, timeout=HTTP_TIMEOUT)
+        except Exception:
+            log.debug("Prewarm of %s failed", origin)
+    submit(warm)
+
+def close():
+    global _session, _executor
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        _warmed.clear()
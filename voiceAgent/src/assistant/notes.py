@@ -0,0 +1,101 @@
+# src/assistant/notes.py
+# All notes live in one append-only JSON Lines journal, one {"id", "ts", "text"} per
+# line. An inverted index (word -> ids of the notes containing it) is built from
+# the journal on first use and then extended line by line, so recall touches only
+# the posting lists of the spoken words, not every note.
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+log = logging.getLogger(__name__)
+NOTES_PATH = os.getenv("VOICE_AGENT_NOTES", "notes.jsonl")
+_WORD_RE = re.compile(r"\w+")
+STOPWORDS = frozenset("a an and are for from i in is it my of on or the to was with".split())
+
+
+def tokenize(text: str) -> set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS}
+
+
+class NotesJournal:
+    def __init__(self, path: str = NOTES_PATH):
+        self.path = path
+        self.notes: list[dict] = []
+        self._index: dict[str, list[int]] = {}  # word -> note ids, ascending
+        self._offset = 0  # bytes of the journal already indexed
+        self._lock = threading.Lock()
+
+    def _index_note(self, note: dict):
+        self.notes.append(note)
+        for word in tokenize(note["text"]):
+            self._index.setdefault(word, []).append(note["id"])
+
+    def _catch_up(self):
+        # index whatever was appended since the last read (including by other processes)
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # partially written line: pick it up next time
+                    self._offset += len(line)
+                    try:
+                        note = json.loads(line)
+                    except ValueError:
+                        log.warning("Skipping corrupt line in %s", self.path)
+                        continue
+                    note["id"] = len(self.notes)
+                    self._index_note(note)
+        except FileNotFoundError:
+            pass
+
+    def add(self, text: str) -> dict:
+        with self._lock:
+            self._catch_up()
+            note = {"id": len(self.notes), "ts": time.time(), "text": text}
+            line = (json.dumps(note, ensure_ascii=False) + "\n").encode("utf-8")
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(line)
+            # index our line from the file like anyone else's: another process may
+            # have appended between the catch-up above and this write
+            start = len(self.notes)
+            self._catch_up()
+            return next((n for n in self.notes[start:] if n["ts"] == note["ts"] and n["text"] == text), note)
+
+    def search(self, query: str, limit: int = 3) -> list[dict]:
+        """Newest notes containing every word of the query (or, failing that, the most words)."""
+        words = tokenize(query)
+        with self._lock:
+            self._catch_up()
+            postings = [self._index.get(w, []) for w in words]
+            if not postings:
+                return []
+            postings.sort(key=len)
+            ids = set(postings[0]).intersection(*postings[1:])
+            if ids:
+                return [self.notes[i] for i in sorted(ids, reverse=True)[:limit]]
+            hits: dict[int, int] = {}
+            for posting in postings:
+                for i in posting:
+                    hits[i] = hits.get(i, 0) + 1
+            ranked = sorted(hits, key=lambda i: (hits[i], i), reverse=True)
+            return [self.notes[i] for i in ranked[:limit]]
+
+    def latest(self, n: int = 3) -> list[dict]:
+        with self._lock:
+            self._catch_up()
+            return self.notes[-n:][::-1]
+
+    def __len__(self):
+        with self._lock:
+            self._catch_up()
+            return len(self.notes)
+
+
+JOURNAL = NotesJournal()
@@ -0,0 +1,186 @@
+# src/assistant/pipeline.py
+# Listen -> recognize -> execute as three overlapping stages:
+#   capture:   one persistent microphone stream, calibrated once, feeding a ring buffer
+#   recognize: a small worker pool transcribes buffered phrases concurrently
+#   execute:   a single executor runs commands one at a time, in the order they were spoken
+# With a streaming recognizer backend, capture and recognition merge: raw audio is fed to
+# the backend as it arrives and partial hypotheses can dispatch a command early.
+#
+# The microphone stays open while the assistant talks, so it hears itself. Phrases
+# that overlap the assistant's speech are recognized silently and only acted on when
+# they start with the activation word (barge-in); everything else heard then is echo.
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+from assistant import speech
+from assistant.speech import transcribe
+
+log = logging.getLogger(__name__)
+
+RECOGNIZE_WORKERS = 2
+BUFFER_SIZE = 8  # phrases waiting for recognition; the oldest is dropped beyond this
+CALIBRATE_SECONDS = 0.5
+PHRASE_TIME_LIMIT = 10
+ECHO_TAIL = 0.3  # seconds of room echo still audible after speech ends
+
+
+class Pipeline:
+    def __init__(self, handle, recognize=transcribe, workers=RECOGNIZE_WORKERS, buffer_size=BUFFER_SIZE,
+                 phrase_time_limit=PHRASE_TIME_LIMIT, microphone=None, recognizer=None,
+                 backend=None, on_partial=None, speaker=None, activation=None):
+        self.handle = handle
+        self.speaker = speaker  # its speaking state gates echo; None: no gating
+        self.activation = activation
+        self.backend = backend
+        self.on_partial = on_partial  # partial text -> True to dispatch it now
+        self.recognize = recognize
+        self.workers = workers
+        self.phrase_time_limit = phrase_time_limit
+        self.microphone = microphone
+        self.recognizer = recognizer or sr.Recognizer()
+        self._ring: deque = deque(maxlen=buffer_size)  # (seq, audio, overlapped speech)
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._results: dict = {}  # seq -> text (None: nothing to run)
+        self._next = 0  # next seq to hand to the executor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="command")
+        self._threads: list = []
+        self._stop_listening = None
+        self.stopped = threading.Event()
+        self.dropped = 0
+
+    # Capture
+    def start(self):
+        self.backend = self.backend or speech.backend
+        if self.backend.streaming:
+            self.microphone = self.microphone or sr.Microphone(sample_rate=self.backend.sample_rate)
+            t = threading.Thread(target=self._stream_loop, name="recognize-stream", daemon=True)
+            t.start()
+            self._threads.append(t)
+            log.info("Listening for commands (streaming)...")
+            return
+        self.microphone = self.microphone or sr.Microphone()
+        with self.microphone as source:
+            self.recognizer.adjust_for_ambient_noise(source, duration=CALIBRATE_SECONDS)
+        for i in range(self.workers):
+            t = threading.Thread(target=self._recognize_loop, name=f"recognize-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._stop_listening = self.recognizer.listen_in_background(
+            self.microphone, self._on_audio, phrase_time_limit=self.phrase_time_limit)
+        log.info("Listening for commands...")
+
+    def _overlaps_speech(self, started: float) -> bool:
+        return self.speaker is not None and self.speaker.spoke_since(started - ECHO_TAIL)
+
+    def _admit(self, text, echo: bool):
+        """The text to act on, or None for an echo of the assistant's own voice."""
+        if not text or not echo:
+            return text
+        words = text.lower().split()
+        if self.activation and words and words[0] == self.activation:
+            return text
+        log.debug("Ignoring phrase heard while speaking: %s", text)
+        return None
+
+    def _on_audio(self, recognizer, audio):
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width) if self.speaker else 0
+        echo = self._overlaps_speech(time.monotonic() - duration)
+        with self._cond:
+            if len(self._ring) == self._ring.maxlen:
+                seq, _, _ = self._ring.popleft()
+                self.dropped += 1
+                log.warning("Recognition is falling behind; dropped a phrase")
+                self._complete(seq, None)
+            self._ring.append((next(self._seq), audio, echo))
+            self._cond.notify()
+
+    # Recognize
+    def _recognize_loop(self):
+        while not self.stopped.is_set():
+            with self._cond:
+                while not self._ring and not self.stopped.is_set():
+                    self._cond.wait(0.5)
+                if self.stopped.is_set():
+                    return
+                seq, audio, echo = self._ring.popleft()
+            try:
+                # failures are not announced for echo: the announcement would be heard again
+                text = self.recognize(audio, self.recognizer, **({"announce": False} if echo else {}))
+                text = self._admit(text, echo)
+            except Exception:
+                log.exception("Speech recognition failed")
+                text = None
+            with self._cond:
+                self._complete(seq, text)
+
+    def _stream_loop(self):
+        with self.microphone as source:
+            def chunks():
+                while not self.stopped.is_set():
+                    yield source.stream.read(source.CHUNK)
+
+            early = False  # the current utterance was already dispatched from a partial
+            started = None  # when the current utterance was first heard
+            for kind, text in self.backend.stream(chunks()):
+                started = started or time.monotonic()
+                text = self._admit(text, self._overlaps_speech(started))
+                if kind == "partial":
+                    if text and not early and self.on_partial is not None and self.on_partial(text):
+                        early = True
+                        self._dispatch(text)
+                    continue
+                if text and not early:
+                    self._dispatch(text)
+                early, started = False, None
+
+    def _dispatch(self, text):
+        with self._cond:
+            self._complete(next(self._seq), text)
+
+    def _complete(self, seq, text):
+        # called with _cond held; releases finished phrases to the executor in spoken order
+        self._results[seq] = text
+        while self._next in self._results:
+            text = self._results.pop(self._next)
+            self._next += 1
+            if text and not self.stopped.is_set():
+                self._executor.submit(self._execute, text)
+
+    # Execute
+    def _execute(self, text):
+        if self.stopped.is_set():
+            return
+        try:
+            self.handle(text)
+        except SystemExit:
+            self.stop()
+        except Exception:
+            log.exception("Error in command handler")
+
+    def run(self):
+        """Start capturing and block until a command asks to exit."""
+        self.start()
+        try:
+            self.stopped.wait()
+        except KeyboardInterrupt:
+            self.stop()
+        self.close()
+
+    def stop(self):
+        self.stopped.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def close(self):
+        self.stop()
+        if self._stop_listening is not None:
+            self._stop_listening(wait_for_stop=False)
+            self._stop_listening = None
+        self._executor.shutdown(wait=True)
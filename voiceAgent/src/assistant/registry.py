@@ -0,0 +1,135 @@
+# src/assistant/registry.py
+# Table-driven voice commands. Handlers register with a decorator:
+#
+#     @registry.command("weather", usage="<city>", help="Current weather")
+#     def weather(rest, config, sp=None): ...
+#
+# Dispatch is a dict lookup for exact verbs and aliases, then a unique-prefix walk
+# over a trie, then a memoized fuzzy match for misrecognized verbs. Immediate verbs
+# (exit, help) only ever match exactly, so ordinary words like "exists" never quit
+# the assistant. Third-party
+# commands are entry points in ENTRY_POINT_GROUP, named by their verb; a plugin is
+# imported only the first time its verb is spoken.
+import asyncio
+import difflib
+import inspect
+import logging
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Callable
+
+log = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "voice_agent.commands"
+MIN_PREFIX = 3       # shortest verb prefix that may resolve to a command
+FUZZY_CUTOFF = 0.75  # difflib similarity needed to accept a misrecognized verb
+
+
+@dataclass
+class Command:
+    name: str
+    handler: Callable
+    aliases: tuple = ()
+    usage: str = ""
+    help: str = ""
+    immediate: bool = False  # takes no argument: may run as soon as the verb is heard
+    is_async: bool = field(init=False)
+
+    def __post_init__(self):
+        self.is_async = inspect.iscoroutinefunction(self.handler)
+
+    def __call__(self, rest: str, config: dict, sp=None):
+        if self.is_async:
+            return asyncio.run(self.handler(rest, config, sp=sp))
+        return self.handler(rest, config, sp=sp)
+
+
+class Registry:
+    def __init__(self, group: str | None = ENTRY_POINT_GROUP):
+        self.group = group
+        self.commands: dict[str, Command] = {}  # in registration order, for help
+        self._verbs: dict[str, Command] = {}   # name and aliases -> command
+        self._trie: dict = {}
+        self._fuzzy: dict[str, str | None] = {}
+        self._plugins = None  # verb -> entry point, read on first miss
+
+    def command(self, name: str, *, aliases=(), usage: str = "", help: str = "", immediate: bool = False):
+        """Decorator registering a handler(rest, config, sp=None); sync or async."""
+        def register(handler):
+            self.add(Command(name, handler, tuple(aliases), usage, help, immediate))
+            return handler
+        return register
+
+    def add(self, cmd: Command):
+        self.commands[cmd.name] = cmd
+        for verb in (cmd.name, *cmd.aliases):
+            self._verbs[verb] = cmd
+            if cmd.immediate:
+                continue  # exact only
+            node = self._trie
+            for ch in verb:
+                node = node.setdefault(ch, {})
+                node.setdefault("", set()).add(cmd.name)
+        self._fuzzy.clear()
+
+    def resolve(self, verb: str, approximate: bool = True) -> Command | None:
+        """Command for a spoken verb; approximate=False skips prefix and fuzzy matching."""
+        cmd = self._verbs.get(verb)
+        if cmd is not None:
+            return cmd
+        if verb in self._load_plugins():
+            return self._load(verb)
+        if not approximate:
+            return None
+        return self._by_prefix(verb) or self._by_similarity(verb)
+
+    def _by_prefix(self, verb: str) -> Command | None:
+        if len(verb) < MIN_PREFIX:
+            return None
+        node = self._trie
+        for ch in verb:
+            node = node.get(ch)
+            if node is None:
+                return None
+        names = node[""]
+        return self.commands[next(iter(names))] if len(names) == 1 else None
+
+    def _by_similarity(self, verb: str) -> Command | None:
+        if verb not in self._fuzzy:
+            if len(self._fuzzy) > 1024:
+                self._fuzzy.clear()
+            candidates = [v for v, cmd in self._verbs.items() if not cmd.immediate]
+            match = difflib.get_close_matches(verb, candidates, n=1, cutoff=FUZZY_CUTOFF)
+            self._fuzzy[verb] = match[0] if match else None
+        match = self._fuzzy[verb]
+        return self._verbs[match] if match else None
+
+    # Plugins
+    def _load_plugins(self) -> dict:
+        if self._plugins is None:
+            self._plugins = {}
+            if self.group:
+                for ep in entry_points(group=self.group):
+                    if ep.name not in self._verbs:
+                        self._plugins[ep.name] = ep
+        return self._plugins
+
+    def _load(self, verb: str) -> Command | None:
+        ep = self._plugins.pop(verb)
+        try:
+            obj = ep.load()
+        except Exception:
+            log.exception("Could not load command plugin %r", verb)
+            return None
+        if not isinstance(obj, Command):
+            obj = Command(verb, obj, help=(inspect.getdoc(obj) or "").split("\n")[0])
+        self.add(obj)
+        return obj
+
+    def help_text(self, activation: str) -> str:
+        lines = [f"Available commands (prefix with '{activation}'):"]
+        for cmd in self.commands.values():
+            lines.append(f"- {(cmd.name + ' ' + cmd.usage).strip():<19}→ {cmd.help}")
+        for verb in self._load_plugins():
+            lines.append(f"- {verb:<19}→ (plugin)")
+        return "\n".join(lines)
@@ -1,55 +1,119 @@
 # src/assistant/services.py
 import logging
-import requests
-import wikipedia
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from spotipy.exceptions import SpotifyException
+import threading
 from assistant.speech import speak
+from assistant import net, spotify
+from assistant.cache import DiskCache, LRUCache, TTLCache
 
 log = logging.getLogger(__name__)
-HTTP_TIMEOUT = 10
+HTTP_TIMEOUT = net.HTTP_TIMEOUT
 
 # Wikipedia
-def search_wikipedia(query: str) -> str:
+# One MediaWiki API round trip does search + intro extract of the top hits; the
+# runner-up hits are cached by title too (prefetch). Summaries are kept in an LRU
+# and on disk keyed by normalized topic, so repeats cost no round trip at all.
+WIKI_API = "https://en.wikipedia.org/w/api.php"
+WIKI_PREFETCH = 3
+WIKI_MEMO = LRUCache(256)
+WIKI_CACHE = DiskCache("wikipedia", max_entries=2000)
+
+def _lookup_wikipedia(query: str) -> tuple[str, dict]:
+    """(answer, summaries worth caching): fetches on a miss but caches nothing itself."""
+    summary = WIKI_MEMO.get(query) or WIKI_CACHE.get(query)
+    if summary:
+        WIKI_MEMO.set(query, summary)
+        return summary, {}
     try:
-        results = wikipedia.search(query)
-        if not results:
-            return "No Wikipedia results."
-        page = wikipedia.page(results[0])
-        return wikipedia.summary(page.title, sentences=3)
+        params = {
+            "action": "query", "format": "json", "formatversion": 2,
+            "generator": "search", "gsrsearch": query, "gsrlimit": WIKI_PREFETCH,
+            "prop": "extracts|pageprops", "ppprop": "disambiguation",
+            "exintro": 1, "explaintext": 1, "exsentences": 3, "exlimit": WIKI_PREFETCH,
+            "redirects": 1,
+        }
+        r = net.get(WIKI_API, params=params, timeout=HTTP_TIMEOUT)
+        r.raise_for_status()
+        pages = r.json().get("query", {}).get("pages", [])
+        pages = sorted((p for p in pages if p.get("extract")), key=lambda p: p.get("index", 0))
+        if not pages:
+            return "No Wikipedia results.", {}
+        # skip "X may refer to:" pages when a real article is among the hits
+        top = next((p for p in pages if "disambiguation" not in p.get("pageprops", {})), pages[0])
+        found = {p["title"]: p["extract"] for p in pages}
+        found[query] = top["extract"]
+        return top["extract"], found
     except Exception as e:
         log.exception("Wikipedia failed")
-        return f"Wikipedia lookup failed: {e}"
+        return f"Wikipedia lookup failed: {e}", {}
+
+def _remember_wikipedia(found: dict):
+    if found:
+        WIKI_CACHE.set_many(found)
+        for key, text in found.items():
+            WIKI_MEMO.set(key, text)
+
+def search_wikipedia(query: str) -> str:
+    answer, found = _lookup_wikipedia(query)
+    _remember_wikipedia(found)
+    return answer
 
 
 # Wolfram Alpha (JSON API)
-def search_wolframalpha(query: str, appid: str) -> str:
+def _wolfram_primary(query: str, appid: str) -> tuple[bool, str | None]:
+    """Returns (success flag, primary/result pod text or None)."""
+    url = "https://api.wolframalpha.com/v2/query"
+    params = {"appid": appid, "input": query, "output": "JSON", "format": "plaintext"}
+    r = net.get(url, params=params, timeout=HTTP_TIMEOUT)
+    r.raise_for_status()
+    q = r.json().get("queryresult", {})
+    if not q.get("success"):
+        return False, None
+    for pod in q.get("pods", []):
+        if pod.get("primary") or "result" in pod.get("title", "").lower():
+            return True, pod["subpods"][0].get("plaintext", "").split("(")[0]
+    return True, None
+
+def search_wolframalpha(query: str, appid: str, speculative: bool = False) -> str:
+    """Wolfram|Alpha answer, falling back to Wikipedia.
+
+    speculative=True starts the Wikipedia lookup alongside Wolfram, so a failed
+    computation costs max(wolfram, wikipedia) instead of their sum.
+    """
     if not appid:
         return "Wolfram|Alpha is not configured."
+    # the speculative lookup caches only if its answer is used: compute queries
+    # like "2+2" would otherwise fill the Wikipedia cache with junk keys
+    wiki = net.submit(_lookup_wikipedia, query) if speculative else None
+
+    def wiki_answer() -> str:
+        answer, found = wiki.result()
+        _remember_wikipedia(found)
+        return answer
+
     try:
-        url = "https://api.wolframalpha.com/v2/query"
-        params = {"appid": appid, "input": query, "output": "JSON", "format": "plaintext"}
-        r = requests.get(url, params=params, timeout=HTTP_TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
-        q = data.get("queryresult", {})
-        if not q.get("success"):
-            speak("Computation failed. Querying universal databank.")
-            return search_wikipedia(query)
-
-        for pod in q.get("pods", []):
-            if pod.get("primary") or "result" in pod.get("title", "").lower():
-                return pod["subpods"][0].get("plaintext", "").split("(")[0]
-        return search_wikipedia(query)
+        success, answer = _wolfram_primary(query, appid)
     except Exception as e:
         log.exception("Wolfram error")
+        if wiki:
+            return wiki_answer()  # the speculative lookup is the answer now
         return f"Wolfram error: {e}"
 
+    if answer is not None:
+        if wiki:
+            wiki.cancel()  # only cancels if it hasn't started; its result is dropped either way
+        return answer
+    if wiki:
+        return wiki_answer()
+    if not success:
+        speak("Computation failed. Querying universal databank.")
+    return search_wikipedia(query)
+
 
 # Spotify 
 def get_spotify(client_id, client_secret, redirect_uri, scope):
     try:
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
         auth = SpotifyOAuth(
             client_id=client_id,
             client_secret=client_secret,
@@ -63,52 +127,45 @@ def get_spotify(client_id, client_secret, redirect_uri, scope):
         log.exception("Spotify init failed")
         return None
 
-def _ensure_active_device(sp, preferred_name: str | None = None) -> str | None:
-    """
-    Returns an active device_id if possible. If none is active but devices exist,
-    transfer playback to one and return its id. Returns None if no devices are available.
-    """
-    try:
-        devices = sp.devices().get("devices", [])
-        if not devices:
-            return None
-
-        # Try preferred device by name
-        if preferred_name:
-            for d in devices:
-                if d.get("name", "").lower() == preferred_name.lower():
-                    if not d.get("is_active"):
-                        sp.transfer_playback(d["id"], force_play=True)
-                    return d["id"]
-
-        # Any active device check
-        for d in devices:
-            if d.get("is_active"):
-                return d["id"]
-
-        # No active device: pick the first and force transfer
-        target = devices[0]
-        sp.transfer_playback(target["id"], force_play=True)
-        return target["id"]
-    except Exception:
-        log.exception("Failed to ensure active device")
-        return None
+class LazyClient:
+    """Stands in for a client built on first use, e.g. Spotify OAuth on the first `play`."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._client = self._factory()
+                    self._built = True
+        return self._client
+
+    def __bool__(self):
+        return self.get() is not None
+
+    def __getattr__(self, name):
+        client = self.get()
+        if client is None:
+            raise AttributeError(name)
+        return getattr(client, name)
 
 def search_and_play_spotify(sp, query: str, preferred_device_name: str | None = None) -> str:
     if not sp:
         return "Spotify not configured."
 
+    session = spotify.session_for(sp)
     try:
-        results = sp.search(q=query, limit=1, type="track")
-        tracks = results.get("tracks", {}).get("items", [])
-        if not tracks:
+        track = session.track(query)  # memoized: no search call for repeated requests
+        if not track:
             return "No track found."
 
-        track = tracks[0]
-
         if preferred_device_name:
             # Only resolve/pass device_id if caller asked for a specific device
-            device_id = _ensure_active_device(sp, preferred_device_name)
+            device_id = session.ensure_device(preferred_device_name)
             if not device_id:
                 return ("No Spotify device is available. Open the Spotify app on any device (phone/desktop/web), make sure you're logged in, then try again.")
             sp.start_playback(device_id=device_id, uris=[track["uri"]])
@@ -118,36 +175,65 @@ def search_and_play_spotify(sp, query: str, preferred_device_name: str | None =
 
         artist = track["artists"][0]["name"]
         return f"Now playing: {track['name']} by {artist}."
-    except SpotifyException as e:
-        # Handle the specific NO_ACTIVE_DEVICE case defensively
-        if e.http_status == 404 and "NO_ACTIVE_DEVICE" in str(e).upper():
+    except Exception as e:
+        # Handle the specific NO_ACTIVE_DEVICE case defensively (SpotifyException,
+        # matched by attribute so spotipy is only imported once Spotify is used)
+        if getattr(e, "http_status", None) == 404 and "NO_ACTIVE_DEVICE" in str(e).upper():
+            session.invalidate_devices()
             return ("No active device found. Open Spotify on a device and try again (you can also set a preferred device name).")
         log.exception("Spotify error")
         return "Spotify playback failed."
-    except Exception:
-        log.exception("Spotify error")
-        return "Spotify playback failed."
     
 # OpenWeather
+# City -> lat/lon practically never changes: cached on disk forever. Current weather
+# is fresh for 10 minutes and served stale (while refreshing) for another 50.
+GEOCODE_CACHE = DiskCache("geocode")
+WEATHER_CACHE = TTLCache(ttl=600, stale_ttl=3000)
+
+def _geocode(city: str, api_key: str):
+    cached = GEOCODE_CACHE.get(city)
+    if cached:
+        return cached
+    geo = "http://api.openweathermap.org/geo/1.0/direct"
+    g = net.get(geo, params={"q": city, "limit": 1, "appid": api_key}, timeout=HTTP_TIMEOUT)
+    g.raise_for_status()
+    data = g.json()
+    if not data:
+        return None
+    loc = [data[0]["lat"], data[0]["lon"]]
+    GEOCODE_CACHE.set(city, loc)
+    return loc
+
+def _current_weather(lat: float, lon: float, api_key: str) -> dict:
+    wx = "https://api.openweathermap.org/data/2.5/weather"
+    w = net.get(wx, params={"lat": lat, "lon": lon, "appid": api_key, "units": "metric"}, timeout=HTTP_TIMEOUT)
+    w.raise_for_status()
+    return w.json()
+
 def search_openweather(city: str, api_key: str) -> str:
     if not api_key:
         return "OpenWeather is not configured."
     try:
-        geo = "http://api.openweathermap.org/geo/1.0/direct"
-        g = requests.get(geo, params={"q": city, "limit": 1, "appid": api_key}, timeout=HTTP_TIMEOUT)
-        g.raise_for_status()
-        data = g.json()
-        if not data:
+        loc = _geocode(city, api_key)
+        if not loc:
             return f"Could not find '{city}'."
-        lat, lon = data[0]["lat"], data[0]["lon"]
-
-        wx = "https://api.openweathermap.org/data/2.5/weather"
-        w = requests.get(wx, params={"lat": lat, "lon": lon, "appid": api_key, "units": "metric"}, timeout=HTTP_TIMEOUT)
-        w.raise_for_status()
-        d = w.json()
+        lat, lon = loc
+        d = WEATHER_CACHE.get_or_fetch(f"{lat:.3f},{lon:.3f}", lambda: _current_weather(lat, lon, api_key))
         temp = d["main"].get("temp")
         desc = d["weather"][0].get("description", "").capitalize()
         return f"The weather in {city}: {desc}, about {round(temp)}°C."
     except Exception as e:
         log.exception("Weather error")
         return f"Weather error: {e}"
+
+
+# Connection prewarming: hosts each lookup talks to, warmed as soon as its verb is heard
+PREWARM_URLS = {
+    "wikipedia": [WIKI_API],
+    "compute": ["https://api.wolframalpha.com/", WIKI_API],
+    "weather": ["http://api.openweathermap.org/", "https://api.openweathermap.org/"],
+}
+
+def prewarm(verb: str):
+    for url in PREWARM_URLS.get(verb, ()):
+        net.prewarm(url)
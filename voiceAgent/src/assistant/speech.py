@@ -1,51 +1,224 @@
 # src/assistant/speech.py
+import json
 import logging
-import pyttsx3
+import queue
+import re
+import threading
+import time
 import speech_recognition as sr
 
 log = logging.getLogger(__name__)
 
-# Init speech engine
-engine = pyttsx3.init()
-try:
-    voices = engine.getProperty("voices")
-    if len(voices) > 1:
-        engine.setProperty("voice", voices[1].id)  # female
-except Exception:
-    log.warning("Could not set preferred voice.")
 
-
-def speak(text: str, rate: int = 150):
+def _make_engine():
+    # imported and initialized on the TTS thread at the first utterance, not at import
+    import pyttsx3
+    engine = pyttsx3.init()
     try:
-        engine.setProperty("rate", rate)
-        engine.say(text)
-        engine.runAndWait()
+        voices = engine.getProperty("voices")
+        if len(voices) > 1:
+            engine.setProperty("voice", voices[1].id)  # female
     except Exception:
-        log.exception("TTS failed")
-        print(text)
+        log.warning("Could not set preferred voice.")
+    return engine
 
 
-def parse_command(timeout=30, phrase_time_limit=10) -> str | None:
-    recognizer = sr.Recognizer()
-    log.info("Listening for a command...")
-    with sr.Microphone() as source:
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class Speaker:
+    """Speaks queued utterances in order on a dedicated TTS thread.
+
+    speak() returns immediately, so listening and network lookups overlap with speech.
+    interrupt() drops everything queued and cuts the current utterance (barge-in).
+    `speaking` is set while the engine is talking, so capture can tell its own voice
+    from the user's (see spoke_since()).
+    """
+
+    def __init__(self, engine_factory):
+        self._engine_factory = engine_factory
+        self._queue: queue.Queue = queue.Queue()
+        self._generation = 0  # bumped by interrupt(); older utterances are skipped
+        self._engine = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.speaking = threading.Event()
+        self.last_spoken = float("-inf")  # monotonic time the last utterance ended
+
+    def spoke_since(self, t: float) -> bool:
+        """True if the assistant was talking at any point after monotonic time t."""
+        return self.speaking.is_set() or self.last_spoken > t
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tts", daemon=True)
+                self._thread.start()
+
+    def say(self, text: str, rate: int = 150):
+        self._ensure_worker()
+        self._queue.put((self._generation, text, rate))
+
+    def say_stream(self, chunks, rate: int = 150):
+        """Speak text as it arrives: each complete sentence is queued as soon as it ends."""
+        buf = ""
+        for chunk in chunks:
+            buf += chunk
+            *sentences, buf = _SENTENCE_END.split(buf)
+            for sentence in sentences:
+                self.say(sentence, rate)
+        if buf.strip():
+            self.say(buf.strip(), rate)
+
+    def interrupt(self):
+        self._generation += 1
         try:
-            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-        except sr.WaitTimeoutError:
-            log.warning("Mic timeout: no speech detected")
-            speak("I didn't hear anything.")
-            return None
+            while True:
+                self._queue.get_nowait()
+                self._queue.task_done()
+        except queue.Empty:
+            pass
+        if self._engine is not None:
+            try:
+                self._engine.stop()
+            except Exception:
+                log.warning("Could not stop TTS engine.")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until everything queued has been spoken."""
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.02)
+        return True
+
+    def _run(self):
+        while True:
+            generation, text, rate = self._queue.get()
+            try:
+                if generation != self._generation:
+                    continue
+                if self._engine is None:
+                    self._engine = self._engine_factory()
+                self._engine.setProperty("rate", rate)
+                self._engine.say(text)
+                self.speaking.set()
+                try:
+                    self._engine.runAndWait()
+                finally:
+                    self.last_spoken = time.monotonic()
+                    self.speaking.clear()
+            except Exception:
+                log.exception("TTS failed")
+                print(text)
+            finally:
+                self._queue.task_done()
+
+
+speaker = Speaker(_make_engine)
+
+
+def speak(text: str, rate: int = 150, block: bool = False):
+    speaker.say(text, rate)
+    if block:
+        speaker.wait()
+
+
+def speak_stream(chunks, rate: int = 150):
+    speaker.say_stream(chunks, rate)
 
+
+# Recognizer backends
+# transcribe(audio, recognizer) turns one captured phrase into text and raises
+# sr.UnknownValueError / sr.RequestError like speech_recognition does. Streaming
+# backends also implement stream(chunks), yielding ("partial" | "final", text)
+# while raw 16-bit mono audio arrives.
+class GoogleBackend:
+    """Google Web Speech API: whole phrases, one network round trip each."""
+    streaming = False
+
+    def transcribe(self, audio, recognizer):
+        return recognizer.recognize_google(audio, language="en-US")
+
+
+class VoskBackend:
+    """Offline, CPU-only Kaldi recognizer with partial hypotheses (pip install vosk)."""
+    streaming = True
+
+    def __init__(self, model_path: str, sample_rate: int = 16000):
+        try:
+            from vosk import KaldiRecognizer, Model
+        except ImportError as e:
+            raise RuntimeError("The vosk recognizer needs `pip install vosk` and a model directory.") from e
+        self._recognizer = KaldiRecognizer
+        self.model = Model(model_path)
+        self.sample_rate = sample_rate
+
+    def transcribe(self, audio, recognizer=None):
+        rec = self._recognizer(self.model, self.sample_rate)
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(rec.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def stream(self, chunks):
+        rec = self._recognizer(self.model, self.sample_rate)
+        last = ""
+        for chunk in chunks:
+            if rec.AcceptWaveform(chunk):
+                text = json.loads(rec.Result()).get("text", "")
+                last = ""
+                if text:
+                    yield "final", text
+            else:
+                partial = json.loads(rec.PartialResult()).get("partial", "")
+                if partial and partial != last:
+                    last = partial
+                    yield "partial", partial
+
+
+BACKENDS = {"google": GoogleBackend, "vosk": VoskBackend}
+backend = GoogleBackend()
+
+
+def use_backend(name: str, **options):
+    """Select the recognizer backend by name ("google" or "vosk")."""
+    global backend
+    backend = BACKENDS[name](**options)
+    return backend
+
+
+def transcribe(audio, recognizer=None, announce: bool = True) -> str | None:
+    """Recognize one captured phrase; returns None (and says why, if `announce`) if it can't."""
+    recognizer = recognizer or sr.Recognizer()
+    say = speak if announce else (lambda text: None)
     try:
-        query = recognizer.recognize_google(audio, language="en-US")
+        query = backend.transcribe(audio, recognizer)
         log.info("Heard: %s", query)
         return query
     except sr.UnknownValueError:
-        speak("I did not catch that.")
+        say("I did not catch that.")
     except sr.RequestError as e:
-        speak("Speech recognition service is unavailable.")
+        say("Speech recognition service is unavailable.")
         log.error("Speech service error: %s", e)
     except Exception:
         log.exception("Speech recognition failed")
-        speak("Something went wrong while listening.")
+        say("Something went wrong while listening.")
     return None
+
+
+def parse_command(timeout=30, phrase_time_limit=10) -> str | None:
+    recognizer = sr.Recognizer()
+    log.info("Listening for a command...")
+    with sr.Microphone() as source:
+        try:
+            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+        except sr.WaitTimeoutError:
+            log.warning("Mic timeout: no speech detected")
+            speak("I didn't hear anything.")
+            return None
+    return transcribe(audio, recognizer)
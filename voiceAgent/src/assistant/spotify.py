@@ -0,0 +1,120 @@
+# src/assistant/spotify.py
+# Spotify session layer: on the warm path "play X" is a single start_playback call.
+#  - query -> track resolutions are memoized for TRACK_TTL seconds
+#  - the device list is cached and refreshed in the background once stale; while it
+#    keeps coming back unchanged the refresh interval doubles (up to DEVICE_MAX_TTL)
+#  - transfer_playback is skipped when the target device is already active
+import logging
+import threading
+import time
+import weakref
+from assistant import net
+from assistant.cache import LRUCache
+
+log = logging.getLogger(__name__)
+TRACK_TTL = 3600
+DEVICE_TTL = 30        # device list is fresh for this long after a change
+DEVICE_MAX_TTL = 240   # ... and for up to this long while it stays the same
+DEVICE_STALE_TTL = 900 # beyond this the list is refetched before use
+
+
+def _fingerprint(devices: list) -> tuple:
+    return tuple(sorted((d.get("id"), bool(d.get("is_active"))) for d in devices))
+
+
+class SpotifySession:
+    def __init__(self, sp):
+        self._sp = weakref.ref(sp)  # weak: the session lives in a WeakKeyDictionary keyed by sp
+        self.tracks = LRUCache(256)  # normalized query -> (resolved_at, track)
+        self._devices: list | None = None
+        self._fetched = 0.0
+        self._ttl = DEVICE_TTL
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def sp(self):
+        return self._sp()
+
+    # Tracks
+    def track(self, query: str) -> dict | None:
+        hit = self.tracks.get(query)
+        if hit and time.monotonic() - hit[0] < TRACK_TTL:
+            return hit[1]
+        items = self.sp.search(q=query, limit=1, type="track").get("tracks", {}).get("items", [])
+        if not items:
+            return None
+        self.tracks.set(query, (time.monotonic(), items[0]))
+        return items[0]
+
+    # Devices
+    def devices(self) -> list:
+        refresh = False
+        with self._lock:
+            devices, age = self._devices, time.monotonic() - self._fetched
+            if devices is not None and self._ttl <= age < DEVICE_STALE_TTL and not self._refreshing:
+                self._refreshing = refresh = True
+        if devices is None or age >= DEVICE_STALE_TTL:
+            return self.refresh_devices()
+        if refresh:
+            net.submit(self._refresh_in_background)
+        return devices
+
+    def refresh_devices(self) -> list:
+        devices = self.sp.devices().get("devices", [])
+        with self._lock:
+            changed = self._devices is None or _fingerprint(devices) != _fingerprint(self._devices)
+            self._ttl = DEVICE_TTL if changed else min(self._ttl * 2, DEVICE_MAX_TTL)
+            self._devices, self._fetched = devices, time.monotonic()
+        if changed:
+            log.info("Spotify devices: %s", ", ".join(d.get("name", "?") for d in devices) or "none")
+        return devices
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh_devices()
+        except Exception:
+            log.warning("Spotify device refresh failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate_devices(self):
+        with self._lock:
+            self._devices = None
+
+    def _mark_active(self, device_id: str):
+        with self._lock:
+            for d in self._devices or []:
+                d["is_active"] = d.get("id") == device_id
+
+    def ensure_device(self, preferred_name: str | None = None) -> str | None:
+        """
+        Returns an active device_id if possible. If none is active but devices exist,
+        transfer playback to one and return its id. Returns None if no devices are available.
+        """
+        devices = self.devices()
+        if not devices:
+            return None
+
+        target = None
+        if preferred_name:
+            target = next((d for d in devices if d.get("name", "").lower() == preferred_name.lower()), None)
+        target = target or next((d for d in devices if d.get("is_active")), None) or devices[0]
+        if not target.get("is_active"):
+            self.sp.transfer_playback(target["id"], force_play=True)
+            self._mark_active(target["id"])
+        return target["id"]
+
+
+_sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_sessions_lock = threading.Lock()
+
+
+def session_for(sp) -> SpotifySession:
+    """The cached session of a Spotify client (one per client object)."""
+    with _sessions_lock:
+        session = _sessions.get(sp)
+        if session is None:
+            session = _sessions[sp] = SpotifySession(sp)
+        return session
@@ -3,9 +3,11 @@ import logging
 import os
 import configparser
 
-from assistant.speech import parse_command, speak
-from assistant.commands import handle_command
-from assistant import services
+from assistant import speech
+from assistant.speech import speak, speaker
+from assistant.pipeline import Pipeline
+from assistant.commands import ACTIVATION, handle_command, on_partial
+from assistant import services, net
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger("main")
@@ -26,32 +28,43 @@ def load_config():
         "SPOTIFY_CLIENT_SECRET": cfg.get("SPOTIFY_CLIENT_SECRET", ""),
         "SPOTIFY_REDIRECT_URI": cfg.get("SPOTIFY_REDIRECT_URI", "http://localhost:8888/callback"),
         "SPOTIFY_SCOPE": cfg.get("SPOTIFY_SCOPE", "user-modify-playback-state user-read-playback-state"),
+        "SPECULATIVE_COMPUTE": cfg.getboolean("SPECULATIVE_COMPUTE", True),
+        "RECOGNIZER": cfg.get("RECOGNIZER", "google"),
+        "VOSK_MODEL": cfg.get("VOSK_MODEL", "model"),
     }
 
 def main():
     config = load_config()
 
-    sp = services.get_spotify(
+    # Spotify auth (and the spotipy import) wait for the first "play" command
+    sp = services.LazyClient(lambda: services.get_spotify(
         config["SPOTIFY_CLIENT_ID"],
         config["SPOTIFY_CLIENT_SECRET"],
         config["SPOTIFY_REDIRECT_URI"],
         config["SPOTIFY_SCOPE"],
-    )
+    ))
+
+    if config["RECOGNIZER"] == "vosk":
+        speech.use_backend("vosk", model_path=config["VOSK_MODEL"])
 
     speak("All systems nominal.")
 
-    while True:
-        query = parse_command()
-        if not query:
-            continue
+    def run_command(query):
         words = query.lower().split()
+        # barge-in: "okay ..." cuts off whatever is still being said
+        if words and words[0] == ACTIVATION:
+            speaker.interrupt()
         try:
             handle_command(words, config, sp=sp)
-        except SystemExit:
-            break
         except Exception:
             log.exception("Error in command handler")
             speak("Something went wrong.")
 
+    Pipeline(run_command, on_partial=lambda text: on_partial(text.lower().split()),
+             speaker=speaker, activation=ACTIVATION).run()
+
+    speaker.wait(timeout=10)  # let "Goodbye." finish
+    net.close()
+
 if __name__ == "__main__":
     main()
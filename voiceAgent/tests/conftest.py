@@ -19,3 +19,22 @@ def config():
         "SPOTIFY_REDIRECT_URI": "http://localhost:8888/callback",
         "SPOTIFY_SCOPE": "user-modify-playback-state user-read-playback-state",
     }
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Keep lookup caches per-test and off the user's cache directory."""
+    from assistant import services
+    from assistant.cache import DiskCache, LRUCache, TTLCache
+    monkeypatch.setattr(services, "GEOCODE_CACHE", DiskCache("geocode", directory=str(tmp_path)))
+    monkeypatch.setattr(services, "WIKI_CACHE", DiskCache("wikipedia", directory=str(tmp_path)))
+    monkeypatch.setattr(services, "WIKI_MEMO", LRUCache())
+    monkeypatch.setattr(services, "WEATHER_CACHE", TTLCache(ttl=600, stale_ttl=3000))
+    from assistant import notes
+    monkeypatch.setattr(notes, "JOURNAL", notes.NotesJournal(str(tmp_path / "notes.jsonl")))
+
+@pytest.fixture(autouse=True)
+def silent_speaker(monkeypatch):
+    """Speak into a fake engine instead of initializing a real TTS driver."""
+    from unittest.mock import MagicMock
+    from assistant import speech
+    monkeypatch.setattr(speech, "speaker", speech.Speaker(MagicMock))
@@ -0,0 +1,13 @@
+from unittest.mock import patch
+from assistant.cache import DiskCache
+
+def test_disk_cache_writes_behind_and_coalesces(tmp_path):
+    cache = DiskCache("wiki", directory=str(tmp_path))
+    with patch("assistant.cache.net.submit") as submit:
+        cache.set_many({"Ada": "Ada Lovelace was a mathematician."})
+        cache.set("Bob", "Bob is a name.")
+    assert not (tmp_path / "wiki.json").exists()  # nothing written on the caller's path
+    assert cache.get("ada") == "Ada Lovelace was a mathematician."
+    submit.assert_called_once()  # one write for the burst
+    submit.call_args.args[0]()
+    assert DiskCache("wiki", directory=str(tmp_path)).get("BOB") == "Bob is a name."
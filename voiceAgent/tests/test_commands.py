@@ -41,3 +41,36 @@ def test_exit_command(speak, config):
     with pytest.raises(SystemExit):
         handle_command(["okay", "exit"], config, sp=None)
     speak.assert_called_with("Goodbye.")
+
+@patch("assistant.services.prewarm")
+def test_on_partial_dispatches_argument_free_verbs_early(prewarm):
+    from assistant.commands import on_partial
+    assert on_partial(["okay", "help"]) is True
+    assert on_partial(["okay", "weather"]) is False
+    prewarm.assert_called_once_with("weather")
+    assert on_partial(["help"]) is False
+
+@patch("assistant.commands.speak")
+@patch("assistant.services.search_openweather")
+def test_misheard_verb_still_resolves(search_openweather, speak, config):
+    search_openweather.return_value = "Rain."
+    handle_command(["okay", "whether", "Oslo"], config, sp=None)
+    search_openweather.assert_called_with("Oslo", config["OPENWEATHER_API_KEY"])
+
+@patch("assistant.commands.speak")
+def test_ordinary_words_do_not_trigger_commands(speak, config):
+    handle_command(["okay", "exists"], config, sp=None)  # fuzzy never reaches exit
+    handle_command(["red", "sky"], config, sp=None)     # no activation word: exact verbs only
+    assert [c[0][0] for c in speak.call_args_list] == ["Unknown command.", "Unknown command."]
+
+@patch("assistant.commands.speak")
+def test_notes_recall_reads_matching_note(speak, config):
+    handle_command(["okay", "notes", "the", "wifi", "password", "is", "hunter2"], config, sp=None)
+    handle_command(["okay", "notes", "buy", "milk"], config, sp=None)
+    handle_command(["okay", "recall", "wifi"], config, sp=None)
+    assert speak.call_args[0][0].endswith(": the wifi password is hunter2")
+
+@patch("assistant.commands.speak")
+def test_read_without_notes(speak, config):
+    handle_command(["okay", "read"], config, sp=None)
+    speak.assert_called_with("You have no notes yet.")
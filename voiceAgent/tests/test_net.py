@@ -0,0 +1,23 @@
+from assistant import net
+
+def test_session_is_shared_and_pooled():
+    s = net.session()
+    assert net.session() is s
+    adapter = s.get_adapter("https://api.openweathermap.org")
+    assert adapter._pool_maxsize == net.POOL_PER_HOST
+
+def test_submit_runs_lookups_concurrently():
+    import threading
+    barrier = threading.Barrier(2, timeout=2)
+    # both calls must be running at the same time to pass the barrier
+    futures = [net.submit(barrier.wait) for _ in range(2)]
+    assert sorted(f.result() for f in futures) == [0, 1]
+
+def test_prewarm_opens_each_host_once_per_interval(monkeypatch):
+    calls = []
+    monkeypatch.setattr(net, "submit", lambda fn: calls.append(fn))
+    net.prewarm("https://en.wikipedia.org/w/api.php")
+    net.prewarm("https://en.wikipedia.org/wiki/Python")
+    net.prewarm("https://api.wolframalpha.com/v2/query")
+    assert len(calls) == 2
+    net.close()
@@ -0,0 +1,50 @@
+import json
+from assistant.notes import NotesJournal
+
+def test_notes_in_the_same_second_are_all_kept(tmp_path):
+    journal = NotesJournal(str(tmp_path / "notes.jsonl"))
+    journal.add("buy milk")
+    journal.add("buy eggs")
+    lines = (tmp_path / "notes.jsonl").read_text().splitlines()
+    assert [json.loads(l)["text"] for l in lines] == ["buy milk", "buy eggs"]
+
+def test_search_prefers_all_words_then_newest(tmp_path):
+    journal = NotesJournal(str(tmp_path / "notes.jsonl"))
+    for text in ("call the dentist", "dentist moved to Friday", "Friday team lunch"):
+        journal.add(text)
+    assert [n["text"] for n in journal.search("dentist friday")] == ["dentist moved to Friday"]
+    assert [n["text"] for n in journal.search("dentist")] == ["dentist moved to Friday", "call the dentist"]
+    assert journal.search("the") == []
+
+def test_index_is_rebuilt_and_extended_from_the_journal(tmp_path):
+    path = str(tmp_path / "notes.jsonl")
+    NotesJournal(path).add("parking level three")
+    reader = NotesJournal(path)
+    assert reader.search("parking")[0]["text"] == "parking level three"
+    NotesJournal(path).add("parking moved to level two")  # appended by someone else
+    assert len(reader.search("parking")) == 2 and len(reader) == 2
+
+def test_partial_last_line_is_left_for_later(tmp_path):
+    path = tmp_path / "notes.jsonl"
+    path.write_text('{"ts": 1, "text": "complete"}\n{"ts": 2, "te')
+    journal = NotesJournal(str(path))
+    assert [n["text"] for n in journal.latest()] == ["complete"]
+
+def test_append_racing_another_writer_keeps_the_index_aligned(tmp_path):
+    path = str(tmp_path / "notes.jsonl")
+    other = NotesJournal(path)
+
+    class Racing(NotesJournal):
+        race = True
+        def _catch_up(self):
+            super()._catch_up()
+            if self.race:  # another process appends right after we caught up
+                self.race = False
+                other.add("written elsewhere")
+
+    journal = Racing(path)
+    note = journal.add("mine")
+    journal.add("mine again")
+    assert note["text"] == "mine" and journal.notes[note["id"]] is note
+    assert [n["text"] for n in journal.latest(5)] == ["mine again", "mine", "written elsewhere"]
+    assert journal.search("elsewhere")[0]["text"] == "written elsewhere"
@@ -0,0 +1,134 @@
+import threading
+import time
+from assistant.pipeline import Pipeline
+
+def make_pipeline(handle, recognize, **kw):
+    p = Pipeline(handle, recognize=recognize, recognizer=object(), **kw)
+    for i in range(p.workers):
+        t = threading.Thread(target=p._recognize_loop, daemon=True)
+        t.start()
+    return p
+
+def wait_for(cond, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+def test_commands_run_in_spoken_order_despite_slow_recognition():
+    ran = []
+    delays = {"first": 0.2, "second": 0.0, "third": 0.05}
+    def recognize(audio, recognizer):
+        time.sleep(delays[audio])
+        return audio
+    p = make_pipeline(ran.append, recognize, workers=3)
+    for audio in ("first", "second", "third"):
+        p._on_audio(None, audio)
+    assert wait_for(lambda: len(ran) == 3)
+    assert ran == ["first", "second", "third"]
+    p.close()
+
+def test_unrecognized_phrase_does_not_block_later_commands():
+    ran = []
+    p = make_pipeline(ran.append, lambda audio, r: None if audio == "noise" else audio)
+    p._on_audio(None, "noise")
+    p._on_audio(None, "time")
+    assert wait_for(lambda: ran == ["time"])
+    p.close()
+
+def test_ring_buffer_drops_oldest_phrase_when_full():
+    p = Pipeline(lambda text: None, recognize=lambda a, r: a, recognizer=object(), buffer_size=2)
+    for audio in ("a", "b", "c"):
+        p._on_audio(None, audio)
+    assert [audio for _, audio, _ in p._ring] == ["b", "c"] and p.dropped == 1
+    assert p._next == 1  # the dropped phrase no longer holds up ordering
+    p.close()
+
+def test_exit_command_stops_pipeline():
+    def handle(text):
+        if text == "exit":
+            raise SystemExit
+    p = make_pipeline(handle, lambda a, r: a)
+    p._on_audio(None, "exit")
+    assert p.stopped.wait(2)
+    p.close()
+
+class FakeStreamingBackend:
+    streaming = True
+    sample_rate = 16000
+
+    def __init__(self, events):
+        self.events = events
+
+    def stream(self, chunks):
+        for event in self.events:
+            next(chunks)
+            yield event
+
+class FakeMicrophone:
+    CHUNK = 1024
+
+    def __init__(self):
+        self.stream = self
+
+    def read(self, size):
+        return b"\0" * size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+def test_streaming_partial_dispatches_early_and_skips_its_final():
+    ran = []
+    backend = FakeStreamingBackend([
+        ("partial", "okay"), ("partial", "okay help"), ("final", "okay help"),
+        ("partial", "okay weather"), ("final", "okay weather paris"),
+    ])
+    p = Pipeline(ran.append, backend=backend, microphone=FakeMicrophone(), recognizer=object(),
+                 on_partial=lambda text: text == "okay help")
+    p._stream_loop()
+    assert wait_for(lambda: len(ran) == 2)
+    assert ran == ["okay help", "okay weather paris"]
+    p.close()
+
+class FakeAudio:
+    sample_rate, sample_width = 16000, 2
+
+    def __init__(self, text, seconds=1.0):
+        self.text = text
+        self.frame_data = b"\0" * int(seconds * self.sample_rate * self.sample_width)
+
+class BusySpeaker:
+    def __init__(self, talking):
+        self.talking = talking
+
+    def spoke_since(self, t):
+        return self.talking
+
+def test_own_speech_is_ignored_but_activation_barges_in():
+    ran, announced = [], []
+    def recognize(audio, recognizer, announce=True):
+        announced.append(announce)
+        return audio.text
+    speaker = BusySpeaker(talking=True)
+    p = make_pipeline(ran.append, recognize, speaker=speaker, activation="okay")
+    p._on_audio(None, FakeAudio("note written"))
+    p._on_audio(None, FakeAudio("okay exit now"))
+    assert wait_for(lambda: ran == ["okay exit now"])
+    assert announced == [False, False]
+    speaker.talking = False
+    p._on_audio(None, FakeAudio("weather paris"))  # quiet room: no activation needed
+    assert wait_for(lambda: ran[-1] == "weather paris")
+    p.close()
+
+def test_streaming_echo_is_ignored():
+    ran = []
+    backend = FakeStreamingBackend([("partial", "note"), ("final", "note written"),
+                                    ("final", "okay time")])
+    p = Pipeline(ran.append, backend=backend, microphone=FakeMicrophone(), recognizer=object(),
+                 speaker=BusySpeaker(talking=True), activation="okay")
+    p._stream_loop()
+    assert wait_for(lambda: ran == ["okay time"])
+    p.close()
@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+from assistant.registry import Command, Registry
+
+def make_registry():
+    reg = Registry(group=None)
+
+    @reg.command("weather", usage="<city>", help="Current weather")
+    def weather(rest, config, sp=None):
+        return f"weather {rest}"
+
+    @reg.command("compute", aliases=("computer",), help="Compute")
+    def compute(rest, config, sp=None):
+        return f"compute {rest}"
+
+    @reg.command("wikipedia", usage="<topic>", help="Wikipedia")
+    async def wikipedia(rest, config, sp=None):
+        await asyncio.sleep(0)
+        return f"wiki {rest}"
+
+    @reg.command("exit", help="Quit", immediate=True)
+    def exit_(rest, config, sp=None):
+        return "bye"
+
+    return reg
+
+def test_exact_alias_prefix_and_fuzzy_resolution():
+    reg = make_registry()
+    assert reg.resolve("weather").name == "weather"
+    assert reg.resolve("computer").name == "compute"
+    assert reg.resolve("wiki").name == "wikipedia"
+    assert reg.resolve("whether").name == "weather"
+    assert reg.resolve("co") is None
+    assert reg.resolve("bananas") is None
+
+def test_immediate_and_unactivated_verbs_match_exactly():
+    reg = make_registry()
+    assert reg.resolve("exit").name == "exit"
+    assert reg.resolve("exits") is None and reg.resolve("exi") is None
+    assert reg.resolve("whether", approximate=False) is None
+    assert reg.resolve("weather", approximate=False).name == "weather"
+
+def test_async_handlers_run_to_completion():
+    cmd = make_registry().resolve("wikipedia")
+    assert cmd.is_async
+    assert cmd("Ada", {}) == "wiki Ada"
+
+def test_help_is_generated_from_registry():
+    text = make_registry().help_text("okay")
+    assert text.splitlines()[0] == "Available commands (prefix with 'okay'):"
+    assert "- weather <city>     → Current weather" in text
+
+def test_plugins_load_on_first_use(monkeypatch):
+    loaded = []
+    def load():
+        loaded.append(True)
+        return Command("joke", lambda rest, config, sp=None: "ha", help="Tell a joke")
+    ep = SimpleNamespace(name="joke", load=load)
+    monkeypatch.setattr("assistant.registry.entry_points", lambda group: [ep])
+    reg = make_registry()
+    reg.group = "voice_agent.commands"
+    assert "joke" in reg.help_text("okay") and not loaded
+    assert reg.resolve("joke")("", {}) == "ha"
+    assert loaded == [True] and reg.resolve("joke").help == "Tell a joke"
@@ -23,3 +23,50 @@ def test_spotify_no_results():
     sp.search.return_value = {"tracks": {"items": []}}
     out = search_and_play_spotify(sp, "NothingHere")
     assert out == "No track found."
+
+def test_lazy_client_builds_on_first_use():
+    from assistant.services import LazyClient
+    built = []
+    client = LazyClient(lambda: built.append(True) or MagicMock(name="spotify"))
+    assert not built
+    client.search(q="x")
+    assert client
+    assert built == [True]
+
+def test_lazy_client_without_credentials_is_falsy():
+    from assistant.services import LazyClient
+    assert search_and_play_spotify(LazyClient(lambda: None), "x") == "Spotify not configured."
+
+def _client(devices):
+    sp = MagicMock()
+    sp.search.return_value = {"tracks": {"items": [
+        {"uri": "spotify:track:1", "name": "Song", "artists": [{"name": "Band"}]}]}}
+    sp.devices.return_value = {"devices": devices}
+    return sp
+
+def test_repeated_play_on_active_device_is_a_single_call():
+    sp = _client([{"id": "d1", "name": "Desk", "is_active": True}])
+    search_and_play_spotify(sp, "Song", preferred_device_name="Desk")
+    sp.reset_mock()
+    out = search_and_play_spotify(sp, "song ", preferred_device_name="Desk")
+    assert out == "Now playing: Song by Band."
+    assert sp.method_calls == [(
+        "start_playback", (), {"device_id": "d1", "uris": ["spotify:track:1"]})]
+
+def test_transfer_only_when_device_inactive():
+    sp = _client([{"id": "d1", "name": "Desk", "is_active": False}])
+    search_and_play_spotify(sp, "Song", preferred_device_name="Desk")
+    search_and_play_spotify(sp, "Song", preferred_device_name="Desk")
+    sp.transfer_playback.assert_called_once_with("d1", force_play=True)
+
+def test_stale_device_list_refreshes_in_background(monkeypatch):
+    from assistant import spotify
+    sp = _client([{"id": "d1", "name": "Desk", "is_active": True}])
+    session = spotify.session_for(sp)
+    session.devices()
+    submitted = []
+    monkeypatch.setattr(spotify.net, "submit", lambda fn: submitted.append(fn))
+    session._fetched -= spotify.DEVICE_TTL
+    assert session.devices()[0]["id"] == "d1" and len(submitted) == 1
+    submitted[0]()  # unchanged list: next refresh waits twice as long
+    assert session._ttl == 2 * spotify.DEVICE_TTL
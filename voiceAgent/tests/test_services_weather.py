@@ -1,7 +1,7 @@
 from unittest.mock import patch, MagicMock
 from assistant.services import search_openweather
 
-@patch("assistant.services.requests.get")
+@patch("assistant.services.net.get")
 def test_weather_happy_path(mock_get):
     # First call: geocoding
     geo_resp = MagicMock()
@@ -22,7 +22,7 @@ def test_weather_happy_path(mock_get):
     assert "22" in out or "23" in out  # rounded temp
     assert "Clear sky" in out
 
-@patch("assistant.services.requests.get")
+@patch("assistant.services.net.get")
 def test_weather_city_not_found(mock_get):
     geo_resp = MagicMock()
     geo_resp.raise_for_status.return_value = None
@@ -31,3 +31,40 @@ def test_weather_city_not_found(mock_get):
 
     out = search_openweather("Atlantis", api_key="key")
     assert "Could not find 'Atlantis'." in out
+
+def _responses():
+    geo_resp = MagicMock()
+    geo_resp.json.return_value = [{"lat": 51.5, "lon": -0.12}]
+    wx_resp = MagicMock()
+    wx_resp.json.return_value = {"main": {"temp": 11.2}, "weather": [{"description": "light rain"}]}
+    return geo_resp, wx_resp
+
+@patch("assistant.services.net.get")
+def test_weather_repeat_is_served_from_cache(mock_get):
+    mock_get.side_effect = list(_responses())
+    first = search_openweather("London", api_key="key")
+    second = search_openweather("  london ", api_key="key")
+    assert "Light rain" in first and "Light rain" in second
+    assert mock_get.call_count == 2  # one geocode + one weather, both cached
+
+@patch("assistant.services.net.get")
+def test_geocode_cache_persists_on_disk(mock_get, tmp_path):
+    from assistant.cache import DiskCache, flush_all
+    mock_get.side_effect = list(_responses())
+    search_openweather("London", api_key="key")
+    flush_all()  # writes are behind the answer; make sure this one landed
+    assert DiskCache("geocode", directory=str(tmp_path)).get("LONDON") == [51.5, -0.12]
+
+@patch("assistant.services.net.submit")
+@patch("assistant.services.net.get")
+def test_stale_weather_answers_instantly_and_refreshes(mock_get, submit, monkeypatch):
+    from assistant import services
+    from assistant.cache import TTLCache
+    monkeypatch.setattr(services, "WEATHER_CACHE", TTLCache(ttl=0, stale_ttl=60))
+    mock_get.side_effect = list(_responses())
+    search_openweather("London", api_key="key")
+    out = search_openweather("London", api_key="key")
+    assert "Light rain" in out
+    assert mock_get.call_count == 2
+    refreshes = [c for c in submit.call_args_list if c.args[0] != services.GEOCODE_CACHE.flush]
+    assert len(refreshes) == 1  # background refresh scheduled (besides the geocode write-behind)
@@ -0,0 +1,38 @@
+from unittest.mock import patch, MagicMock
+from assistant.services import search_wikipedia
+
+def _search_response():
+    resp = MagicMock()
+    resp.raise_for_status.return_value = None
+    resp.json.return_value = {
+        "query": {
+            "pages": [
+                {"title": "Ada (programming language)", "index": 2, "extract": "Ada is a language."},
+                {"title": "Ada Lovelace", "index": 1, "extract": "Ada Lovelace was a mathematician."},
+                {"title": "Ada", "index": 0, "extract": "Ada may refer to:", "pageprops": {"disambiguation": ""}},
+            ]
+        }
+    }
+    return resp
+
+@patch("assistant.services.net.get")
+def test_wikipedia_single_round_trip(mock_get):
+    mock_get.return_value = _search_response()
+    out = search_wikipedia("Ada")
+    assert out == "Ada Lovelace was a mathematician."  # disambiguation page skipped
+    assert mock_get.call_count == 1
+
+@patch("assistant.services.net.get")
+def test_wikipedia_repeat_and_prefetched_hits_are_cached(mock_get):
+    mock_get.return_value = _search_response()
+    search_wikipedia("Ada")
+    assert search_wikipedia("  ada ") == "Ada Lovelace was a mathematician."
+    assert search_wikipedia("Ada (programming language)") == "Ada is a language."
+    assert mock_get.call_count == 1
+
+@patch("assistant.services.net.get")
+def test_wikipedia_no_results(mock_get):
+    resp = MagicMock()
+    resp.json.return_value = {"batchcomplete": True}
+    mock_get.return_value = resp
+    assert search_wikipedia("qwxzv") == "No Wikipedia results."
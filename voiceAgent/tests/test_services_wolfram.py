@@ -1,7 +1,8 @@
+import pytest
 from unittest.mock import patch, MagicMock
 from assistant.services import search_wolframalpha
 
-@patch("assistant.services.requests.get")
+@patch("assistant.services.net.get")
 @patch("assistant.services.speak")  # used on fallback
 def test_wolfram_success(speak, mock_get):
     # Mock a successful JSON response with a primary pod
@@ -21,7 +22,7 @@ def test_wolfram_success(speak, mock_get):
     out = search_wolframalpha("2+2", appid="appid")
     assert out.strip() == "4"
 
-@patch("assistant.services.requests.get")
+@patch("assistant.services.net.get")
 @patch("assistant.services.speak")
 def test_wolfram_fallback_to_wikipedia(speak, mock_get, monkeypatch):
     # success=False triggers Wikipedia fallback
@@ -37,3 +38,48 @@ def test_wolfram_fallback_to_wikipedia(speak, mock_get, monkeypatch):
     out = search_wolframalpha("garbage", appid="appid")
     assert out == "Wiki fallback"
     speak.assert_called_once()  # “Computation failed…” feedback
+
+@patch("assistant.services.net.get")
+@patch("assistant.services.speak")
+def test_wolfram_speculative_races_wikipedia(speak, mock_get, monkeypatch):
+    import threading
+    from assistant import services
+    wiki_started = threading.Event()
+
+    def slow_wolfram(*args, **kwargs):
+        # Wikipedia must already be running while Wolfram is still in flight
+        assert wiki_started.wait(1)
+        resp = MagicMock()
+        resp.json.return_value = {"queryresult": {"success": False}}
+        return resp
+
+    def wiki(q):
+        wiki_started.set()
+        return "Wiki raced", {}
+
+    mock_get.side_effect = slow_wolfram
+    monkeypatch.setattr(services, "_lookup_wikipedia", wiki)
+    assert search_wolframalpha("garbage", appid="appid", speculative=True) == "Wiki raced"
+    speak.assert_not_called()  # no spoken interlude on the speculative path
+
+@patch("assistant.services.net.get")
+def test_wolfram_speculative_prefers_wolfram(mock_get, monkeypatch):
+    from assistant import services
+    resp = MagicMock()
+    resp.json.return_value = {"queryresult": {"success": True, "pods": [
+        {"title": "Result", "primary": True, "subpods": [{"plaintext": "4"}]}]}}
+    mock_get.return_value = resp
+    monkeypatch.setattr(services, "_lookup_wikipedia", lambda q: ("Wiki", {q: "Wiki"}))
+    monkeypatch.setattr(services, "_remember_wikipedia", lambda found: pytest.fail("cached an unused lookup"))
+    assert search_wolframalpha("2+2", appid="appid", speculative=True) == "4"
+
+@patch("assistant.services.net.get")
+def test_wolfram_error_keeps_speculative_wikipedia(mock_get, monkeypatch):
+    from assistant import services
+    mock_get.side_effect = ConnectionError("offline")
+    remembered = []
+    monkeypatch.setattr(services, "_lookup_wikipedia", lambda q: ("Wiki", {q: "Wiki"}))
+    monkeypatch.setattr(services, "_remember_wikipedia", remembered.append)
+    assert search_wolframalpha("garbage", appid="appid", speculative=True) == "Wiki"
+    assert remembered == [{"garbage": "Wiki"}]  # used, so cached
+    assert search_wolframalpha("garbage", appid="appid").startswith("Wolfram error")
@@ -0,0 +1,90 @@
+import threading
+import time
+from assistant.speech import Speaker
+
+class FakeEngine:
+    def __init__(self, gate=None):
+        self.spoken = []
+        self.gate = gate
+        self.thread = None
+    def setProperty(self, name, value):
+        pass
+    def say(self, text):
+        self.spoken.append(text)
+    def runAndWait(self):
+        self.thread = threading.current_thread().name
+        if self.gate:
+            self.gate.wait(1)
+    def stop(self):
+        pass
+
+def test_speak_is_queued_in_order_on_tts_thread():
+    engine = FakeEngine()
+    speaker = Speaker(lambda: engine)
+    for text in ("one", "two", "three"):
+        speaker.say(text)
+    assert speaker.wait(timeout=2)
+    assert engine.spoken == ["one", "two", "three"]
+    assert engine.thread == "tts"
+
+def test_interrupt_drops_queued_utterances():
+    gate = threading.Event()
+    engine = FakeEngine(gate)
+    speaker = Speaker(lambda: engine)
+    speaker.say("long answer")
+    speaker.say("more")
+    speaker.say("and more")
+    speaker.interrupt()
+    gate.set()
+    speaker.say("next")
+    assert speaker.wait(timeout=2)
+    assert "and more" not in engine.spoken and engine.spoken[-1] == "next"
+
+def test_stream_speaks_complete_sentences():
+    engine = FakeEngine()
+    speaker = Speaker(lambda: engine)
+    speaker.say_stream(["Hello the", "re. How are", " you? Fine"])
+    assert speaker.wait(timeout=2)
+    assert engine.spoken == ["Hello there.", "How are you?", "Fine"]
+
+def test_speaking_state_is_tracked_around_playback():
+    gate = threading.Event()
+    engine = FakeEngine(gate)
+    speaker = Speaker(lambda: engine)
+    before = time.monotonic()
+    assert not speaker.spoke_since(before)
+    speaker.say("hello")
+    assert speaker.speaking.wait(2) and speaker.spoke_since(before)
+    gate.set()
+    assert speaker.wait(timeout=2)
+    assert not speaker.speaking.is_set()
+    assert speaker.spoke_since(before) and not speaker.spoke_since(time.monotonic())
+
+def test_vosk_backend_streams_partials_then_final(monkeypatch):
+    import json, sys, types
+    from assistant.speech import VoskBackend
+
+    class FakeKaldi:
+        def __init__(self, model, rate):
+            self.heard = []
+        def AcceptWaveform(self, chunk):
+            self.heard.append(chunk.decode())
+            return chunk == b"."
+        def PartialResult(self):
+            return json.dumps({"partial": " ".join(self.heard)})
+        def Result(self):
+            text = " ".join(self.heard[:-1])
+            self.heard = []
+            return json.dumps({"text": text})
+
+    vosk = types.SimpleNamespace(Model=lambda path: path, KaldiRecognizer=FakeKaldi)
+    monkeypatch.setitem(sys.modules, "vosk", vosk)
+    events = list(VoskBackend("model").stream([b"okay", b"time", b"."]))
+    assert events == [("partial", "okay"), ("partial", "okay time"), ("final", "okay time")]
+
+def test_import_does_not_start_tts():
+    import subprocess, sys
+    from pathlib import Path
+    code = "import sys; import assistant.commands; print('pyttsx3' in sys.modules, 'spotipy' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent / "src", capture_output=True, text=True)
+    assert out.stdout.split() == ["False", "False"], out.stderr
@@ -1,15 +1,33 @@
 
-import os, time
-from typing import List, Dict, Optional
+import os, json, math, time, asyncio, logging
+from typing import List, Optional, Tuple
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse, Response
 from pydantic import BaseModel
-from brains import Brain, RulesBrain, GroqBrain
+from brains import Brain, RulesBrain, GroqBrain, error_reply
+from cache import CachedBrain, prompt_key
+from coalesce import SingleFlight
+from frames import FrameCoalescer
+from pool import BrainPool, PoolFull
+from router import RouterBrain
+from static import PrecompressedStatic
+from store import ConversationStore, make_store
+import metrics
+from metrics import REGISTRY, span, record
 
 # Config
 API_KEY = os.getenv("BOT_API_KEY")  # set this to enable simple header auth
 ALLOW_ORIGINS = os.getenv("ALLOW_ORIGINS", "*").split(",") 
+WS_FRAME_CHARS = int(os.getenv("WS_FRAME_CHARS", "64"))  # flush a frame at this many chars...
+WS_FRAME_MS = float(os.getenv("WS_FRAME_MS", "30"))      # ...or this long after its first token
+WS_FRAME_CHARS_MAX = 4096  # per-connection overrides are clamped to these ranges;
+WS_FRAME_MS_RANGE = (1.0, 1000.0)  # the deadline stays > 0, or slow streams wait for max_chars
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "16"))  # /chat/batch messages in flight
+BATCH_MAX = int(os.getenv("BATCH_MAX", "1000"))                # messages accepted per batch
+
+log = logging.getLogger("weBot")
 
 # App & CORS
 app = FastAPI(title="Web Chat Bot API", version="1.0.0")
@@ -19,15 +37,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Prev-Cursor", "X-Next-Cursor"],  # /history cursors, readable cross-origin
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Conversation memory (bounded in-process LRU by default, SQLite via STORE=sqlite)
+STORE: ConversationStore = make_store()
 
-# Simple memory
-conversations: Dict[str, List[Dict]] = {}
+async def store_call(method, *args):
+    """Runs a STORE method from async code: in a worker thread if the store blocks (SQLite)."""
+    if STORE.blocking:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
 
 # Auth
 def require_api_key(x_api_key: Optional[str] = Header(default=None)):
-    if API_KEY and x_api_key != API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+    with span("auth"):
+        if API_KEY and x_api_key != API_KEY:
+            raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
 # Schemas
 class ChatRequest(BaseModel):
@@ -43,37 +70,251 @@ class ChatResponse(BaseModel):
 # choose a brain via env var
 def make_brain() -> Brain:
     kind = os.getenv("BRAIN", "rules").lower()
-    if kind == "groq":
-        return GroqBrain()
-    return RulesBrain()
+    pooled = os.getenv("BRAIN_POOL", "0") == "1"
+    if kind == "router":
+        # several Groq models + RulesBrain, latency/error-aware failover
+        brain: Brain = RouterBrain.from_env()
+    elif kind == "groq":
+        brain = GroqBrain(strict=pooled)
+    else:
+        brain = RulesBrain()
+    # optional concurrency limit, queueing and retry/backoff around the upstream
+    if pooled:
+        brain = BrainPool.from_env(brain)
+    # optional response cache for repeated prompts (greetings, FAQs)
+    if os.getenv("BRAIN_CACHE", "0") == "1":
+        brain = CachedBrain.from_env(brain)
+    return brain
 
 BRAIN: Brain = make_brain()
 
-def generate_reply(user_id: str, message: str) -> str:
+# Identical in-flight requests (same message, same recent context) share one upstream stream
+FLIGHTS = SingleFlight()
+
+# Metrics
+BRAIN_TTFT = REGISTRY.histogram("weBot_brain_ttft_seconds", "Upstream time to first token", ["brain"])
+BRAIN_SECONDS = REGISTRY.histogram("weBot_brain_stream_seconds", "Upstream stream duration", ["brain"])
+BRAIN_TOKENS = REGISTRY.counter("weBot_brain_tokens_total", "Tokens streamed from the brain", ["brain"])
+WS_MESSAGE_SECONDS = REGISTRY.histogram("weBot_ws_message_seconds", "WebSocket message to end of reply", ["status"])
+WS_ACTIVE = REGISTRY.gauge("weBot_ws_active", "Open WebSocket connections")
+REGISTRY.gauge("weBot_conversations", "Conversations held by the store", fn=lambda: len(STORE))
+REGISTRY.gauge("weBot_flights_in_flight", "Coalesced upstream streams in flight", fn=lambda: len(FLIGHTS))
+
+def brain_stats() -> dict:
+    out, brain = {}, BRAIN
+    while brain is not None:
+        if hasattr(brain, "stats"):
+            out[type(brain).__name__] = brain.stats()
+        brain = getattr(brain, "inner", None)
+    return out
+
+def _numeric_brain_stats():
+    # flat (component, stat) gauges; router backends nest one level deeper
+    rows = []
+    for component, values in brain_stats().items():
+        for stat, v in values.items():
+            if isinstance(v, dict):
+                rows += [((f"{component}.{stat}", k), x) for k, x in v.items() if isinstance(x, (int, float))]
+            elif isinstance(v, (int, float)) and not isinstance(v, bool):
+                rows.append(((component, stat), v))
+    return rows
+
+REGISTRY.gauge("weBot_brain_stat", "Brain wrapper stats (pool queue, cache hits, router health)",
+               ["component", "stat"], fn=_numeric_brain_stats)
+
+def _brain_name(brain: Brain) -> str:
+    while getattr(brain, "inner", None) is not None:
+        brain = brain.inner
+    return type(brain).__name__
+
+BRAIN_NAME = _brain_name(BRAIN)
+
+async def observe_upstream(stream):
+    """Per upstream call: TTFT, duration and token count by brain."""
+    t0, tokens = time.perf_counter(), 0
+    try:
+        async for token in stream:
+            if tokens == 0 and REGISTRY.enabled:
+                BRAIN_TTFT.observe(time.perf_counter() - t0, BRAIN_NAME)
+            tokens += 1
+            yield token
+    finally:
+        if REGISTRY.enabled:
+            BRAIN_SECONDS.observe(time.perf_counter() - t0, BRAIN_NAME)
+            BRAIN_TOKENS.inc(tokens, BRAIN_NAME)
+
+async def observe_stages(stream):
+    """Per caller: upstream_ttft and stream stages of the current trace."""
+    t0 = time.perf_counter()
+    first = None
+    try:
+        async for token in stream:
+            if first is None:
+                first = time.perf_counter()
+                record("upstream_ttft", first - t0)
+            yield token
+    finally:
+        if first is not None:
+            record("stream", time.perf_counter() - first)
+
+def stream_reply(history, message: str):
+    start = lambda: observe_upstream(BRAIN.astream_reply(history, message))
+    if os.getenv("SINGLE_FLIGHT", "1") != "1":
+        return observe_stages(start())
+    return observe_stages(FLIGHTS.stream(prompt_key(history, message), start))
+
+async def generate_reply(user_id: str, message: str) -> str:
     if message.strip().lower() == "reset":
-        conversations[user_id] = []
+        await store_call(STORE.reset, user_id)
         return "Conversation reset. What's next?"
-    history = conversations.get(user_id, [])
-    return BRAIN.reply(history, message)
+    with span("history"):
+        history = await store_call(STORE.context, user_id)
+    try:
+        return "".join([token async for token in stream_reply(history, message)]).strip()
+    except PoolFull:
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly", headers={"Retry-After": "1"})
+    except Exception as e:
+        return error_reply("Upstream", e)
 
 
 # REST: POST /chat
+async def chat_turn(user_id: str, message: str) -> ChatResponse:
+    user_msg = {"role": "user", "text": message, "ts": time.time()}
+    with span("store_write"):
+        await store_call(STORE.append, user_id, user_msg)
+    try:
+        reply = await generate_reply(user_id, message)
+    except HTTPException:
+        # the turn never ran (pool full): a retry must not find the message already there
+        await store_call(STORE.discard, user_id, user_msg["seq"])
+        raise
+    with span("store_write"):
+        context_len = await store_call(STORE.append, user_id, {"role": "bot", "text": reply, "ts": time.time()})
+    return ChatResponse(reply=reply, user_id=user_id, context_len=context_len)
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(body: ChatRequest, _=Depends(require_api_key)):
-    user_id = body.user_id
-    message = body.message
+async def chat(body: ChatRequest, _=Depends(require_api_key)):
+    return await chat_turn(body.user_id, body.message)
 
-    conversations.setdefault(user_id, []).append({"role": "user", "text": message, "ts": time.time()})
-    reply = generate_reply(user_id, message)
-    conversations[user_id].append({"role": "bot", "text": reply, "ts": time.time()})
-    return ChatResponse(reply=reply, user_id=user_id, context_len=len(conversations[user_id]))
+# REST: POST /chat/batch
+# Different users' messages run concurrently, at most BATCH_CONCURRENCY at a time;
+# one user's messages run in the order given, so each sees the previous reply.
+class ChatBatchRequest(BaseModel):
+    messages: List[ChatRequest]
+
+class BatchItem(BaseModel):
+    index: int  # position in the request
+    user_id: str
+    reply: Optional[str] = None
+    context_len: Optional[int] = None
+    error: Optional[str] = None  # set instead of reply, e.g. when the brain pool is full
+    status: int = 200
 
-# REST: GET last N messages
+async def run_batch(messages: List[ChatRequest], on_result):
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+    by_user: dict = {}
+    for i, m in enumerate(messages):
+        by_user.setdefault(m.user_id, []).append(i)
+
+    async def run_user(indices):
+        for i in indices:
+            m = messages[i]
+            try:
+                async with sem:
+                    res = await chat_turn(m.user_id, m.message)
+                item = BatchItem(index=i, user_id=m.user_id, reply=res.reply, context_len=res.context_len)
+            except HTTPException as e:
+                item = BatchItem(index=i, user_id=m.user_id, error=str(e.detail), status=e.status_code)
+            await on_result(item)
+
+    await asyncio.gather(*(run_user(indices) for indices in by_user.values()))
+
+@app.post("/chat/batch", response_model=List[BatchItem])
+async def chat_batch(body: ChatBatchRequest, stream: bool = False, _=Depends(require_api_key)):
+    """Results in request order, or with ?stream=true as NDJSON lines in completion order."""
+    if len(body.messages) > BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX} messages per batch")
+    if not stream:
+        results: List[Optional[BatchItem]] = [None] * len(body.messages)
+
+        async def collect(item):
+            results[item.index] = item
+        await run_batch(body.messages, collect)
+        return results
+
+    async def ndjson():
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(run_batch(body.messages, queue.put))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (item := await queue.get()) is not None:
+                yield item.model_dump_json() + "\n"
+            await task  # re-raise anything unexpected
+        finally:
+            task.cancel()  # client went away: stop fanning out
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+# REST: brain wrapper stats (cache hit rate, pool queue depth/wait time, ...)
+@app.get("/stats")
+def stats(_=Depends(require_api_key)):
+    out = brain_stats()
+    out["flights"] = {"in_flight": len(FLIGHTS), "started": FLIGHTS.started, "joined": FLIGHTS.joined}
+    return out
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(_=Depends(require_api_key)):
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# REST: GET a page of messages (default: the last N), oldest first.
+# Scroll back with ?before=<X-Prev-Cursor>, forward with ?after=<X-Next-Cursor>.
+# Plain def (like /export): FastAPI already runs it in the threadpool.
 @app.get("/history/{user_id}")
-def history(user_id: str, n: int = 20, _=Depends(require_api_key)):
-    return conversations.get(user_id, [])[-n:]
+def history(response: Response, user_id: str, n: int = 20, before: Optional[int] = None,
+            after: Optional[int] = None, _=Depends(require_api_key)):
+    with span("history"):
+        items = STORE.page(user_id, n + 1, before=before, after=after)  # one extra: is there more?
+    more = len(items) > n
+    if more:
+        items = items[:n] if after is not None else items[len(items) - n:]
+    older = more if after is None else True
+    newer = more if after is not None else before is not None
+    if items and older:
+        response.headers["X-Prev-Cursor"] = str(items[0]["seq"])
+    if items and newer:
+        response.headers["X-Next-Cursor"] = str(items[-1]["seq"])
+    return items
+
+# REST: stream one user's history, or everyone's, as NDJSON in constant memory
+def ndjson_export(user_id: Optional[str] = None):
+    for chunk in STORE.export(user_id):
+        yield "".join(json.dumps({"user_id": uid, **m}) + "\n" for uid, m in chunk)
+
+@app.get("/export")
+def export_all(_=Depends(require_api_key)):
+    return StreamingResponse(ndjson_export(), media_type="application/x-ndjson")
+
+@app.get("/export/{user_id}")
+def export_user(user_id: str, _=Depends(require_api_key)):
+    return StreamingResponse(ndjson_export(user_id), media_type="application/x-ndjson")
 
 # WebSocket: /ws/{user_id}
+def query_number(params, name: str, cast, default, lo, hi):
+    """A numeric query param clamped to [lo, hi]; the default if missing or malformed."""
+    try:
+        value = cast(params.get(name, default))
+    except ValueError:
+        return default
+    if not math.isfinite(value):
+        return default
+    return min(max(value, lo), hi)
+
+def frame_settings(params) -> Tuple[int, float]:
+    """(max_chars, max_latency in seconds) for ?frame_chars=64&frame_ms=30."""
+    max_chars = query_number(params, "frame_chars", int, WS_FRAME_CHARS, 1, WS_FRAME_CHARS_MAX)
+    frame_ms = query_number(params, "frame_ms", float, WS_FRAME_MS, *WS_FRAME_MS_RANGE)
+    return max_chars, frame_ms / 1000
+
 @app.websocket("/ws/{user_id}")
 async def ws_endpoint(ws: WebSocket, user_id: str):
     key = ws.query_params.get("key")
@@ -81,46 +322,73 @@ async def ws_endpoint(ws: WebSocket, user_id: str):
         await ws.close(code=4401); return
 
     await ws.accept()
-    conversations.setdefault(user_id, [])
+    WS_ACTIVE.inc()
+    # per-connection frame batching
+    max_chars, max_latency = frame_settings(ws.query_params)
+    frames = FrameCoalescer(ws.send_text, max_chars=max_chars, max_latency=max_latency)
     try:
         while True:
             user_text = await ws.receive_text()
             if user_text.strip().lower() == "reset":
-                conversations[user_id] = []
+                await store_call(STORE.reset, user_id)
                 await ws.send_text("Conversation reset. What’s next?")
                 continue
 
+            trace = metrics.start_trace("/ws/{user_id}")
+            status = "ok"
             # record user msg
-            conversations[user_id].append({"role": "user", "text": user_text, "ts": time.time()})
+            user_msg = {"role": "user", "text": user_text, "ts": time.time()}
+            with span("store_write"):
+                await store_call(STORE.append, user_id, user_msg)
+            with span("history"):
+                history = await store_call(STORE.context, user_id)
 
             # stream tokens if the brain supports it
             try:
-                chunk_buf = []
-                full_text = ""
-
-                async def flush():
-                    nonlocal chunk_buf
-                    if chunk_buf:
-                        await ws.send_text("".join(chunk_buf))
-                        chunk_buf = []
-
-                for token in BRAIN.stream_reply(conversations[user_id], user_text):
-                    full_text += token
-                    chunk_buf.append(token)
-                    # send 64+ chars at a time to avoid too many frames
-                    if sum(len(t) for t in chunk_buf) >= 64:
-                        await flush()
-                await flush()
-                bot_text = full_text
+                parts = []
+                frames.begin()
+                async for token in stream_reply(history, user_text):
+                    parts.append(token)
+                    await frames.push(token)
+                await frames.flush()
+                log.debug("ws %s frames: %s", user_id, frames.stats())
+                bot_text = "".join(parts)
             except AttributeError:
-                # non-streaming
-                bot_text = BRAIN.reply(conversations[user_id], user_text)
+                # non-streaming: still keep the blocking call off the event loop
+                bot_text = await run_in_threadpool(BRAIN.reply, history, user_text)
+                await ws.send_text(bot_text)
+            except PoolFull:
+                frames.cancel()
+                await store_call(STORE.discard, user_id, user_msg["seq"])
+                await ws.send_text("Server busy, try again shortly.")
+                if REGISTRY.enabled:
+                    WS_MESSAGE_SECONDS.observe(time.perf_counter() - trace.started, "busy")
+                trace.finish(status="busy", **frames.stats())
+                continue
+            except Exception as e:
+                frames.cancel()
+                status = "error"
+                bot_text = error_reply("Upstream", e)
                 await ws.send_text(bot_text)
 
             # record bot msg
-            conversations[user_id].append({"role": "bot", "text": bot_text, "ts": time.time()})
+            with span("store_write"):
+                await store_call(STORE.append, user_id, {"role": "bot", "text": bot_text, "ts": time.time()})
+            if REGISTRY.enabled:
+                WS_MESSAGE_SECONDS.observe(time.perf_counter() - trace.started, status)
+            trace.finish(status=status, **frames.stats())
     except WebSocketDisconnect:
         return
+    finally:
+        WS_ACTIVE.dec()
+        frames.cancel()
+
+# Serve frontend (precompressed, ETag-validated)
+STATIC = PrecompressedStatic("public")
+app.mount("/", STATIC, name="static")
 
-# Serve frontend
-app.mount("/", StaticFiles(directory="public", html=True), name="static")
+if __name__ == "__main__":
+    import uvicorn
+    # permessage-deflate (RFC 7692) compresses streamed replies across frames on /ws
+    uvicorn.run(app, host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", "8000")),
+                ws="websockets", ws_per_message_deflate=os.getenv("WS_DEFLATE", "1") == "1")
@@ -0,0 +1,33 @@
+# bench/bench_context.py
+# Per-turn prompt build cost vs. history length: plain list (re-converted every
+# turn) against the store's incremental MessageBuffer.
+#   python bench/bench_context.py
+import os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from context import ContextWindow
+from store import MemoryStore
+
+TURNS = 200  # timed turns per size
+
+def bench(size: int):
+    store = MemoryStore(max_messages=size + TURNS + 1, max_users=1)
+    for i in range(size):
+        store.append("u", {"role": "user" if i % 2 == 0 else "bot", "text": f"message {i} about something", "ts": 0})
+    window = ContextWindow(max_tokens=3000)
+    plain = incremental = 0.0
+    for i in range(TURNS):
+        store.append("u", {"role": "user", "text": f"new turn {i}", "ts": 0})
+        t0 = time.perf_counter()
+        window.build(store.get("u"))
+        t1 = time.perf_counter()
+        window.build(store.context("u"))
+        t2 = time.perf_counter()
+        plain += t1 - t0
+        incremental += t2 - t1
+    return plain / TURNS * 1e6, incremental / TURNS * 1e6
+
+if __name__ == "__main__":
+    print(f"{'history':>8} {'plain us/turn':>14} {'buffer us/turn':>15}")
+    for size in (100, 1_000, 10_000, 100_000):
+        p, b = bench(size)
+        print(f"{size:>8} {p:>14.1f} {b:>15.1f}")
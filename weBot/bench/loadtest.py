@@ -0,0 +1,172 @@
+# bench/loadtest.py
+# Local load test for /chat, /history and /ws: no network, no API keys.
+# A simulated streaming brain replaces BRAIN; the app runs under uvicorn on a
+# loopback port in a background thread and N concurrent clients drive it.
+#   python bench/loadtest.py --rest-clients 50 --ws-clients 50 --requests 20
+import os, sys, json, time, random, socket, asyncio, argparse, threading
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # app mounts ./public
+
+import httpx
+import uvicorn
+import websockets
+from brains import Brain
+
+class SimBrain(Brain):
+    """Streams `tokens` tokens at `token_rate`/s after a log-normal time-to-first-token."""
+
+    def __init__(self, ttft_ms: float = 150, sigma: float = 0.5, tokens: int = 40, token_rate: float = 200):
+        self.ttft = ttft_ms / 1000
+        self.sigma = sigma
+        self.tokens = tokens
+        self.gap = 1 / token_rate if token_rate > 0 else 0
+
+    def _ttft(self) -> float:
+        return random.lognormvariate(0, self.sigma) * self.ttft
+
+    def reply(self, history, user_input):
+        time.sleep(self._ttft() + self.gap * self.tokens)
+        return "tok " * self.tokens
+
+    def stream_reply(self, history, user_input):
+        time.sleep(self._ttft())
+        for _ in range(self.tokens):
+            yield "tok "
+            time.sleep(self.gap)
+
+    async def astream_reply(self, history, user_input):
+        await asyncio.sleep(self._ttft())
+        for _ in range(self.tokens):
+            yield "tok "
+            await asyncio.sleep(self.gap)
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource  # peak, not current, on non-Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def summarize(name, latencies, ttfts, errors, elapsed):
+    row = {"path": name, "requests": len(latencies), "errors": errors,
+           "rps": len(latencies) / elapsed if elapsed else 0.0}
+    for p in (50, 95, 99):
+        row[f"p{p}_ms"] = pct(latencies, p) * 1000 if latencies else None
+    if ttfts:
+        for p in (50, 95, 99):
+            row[f"ttft_p{p}_ms"] = pct(ttfts, p) * 1000
+    return row
+
+def start_server(app):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, port
+
+async def rest_client(base, cid, args, out):
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        for i in range(args.requests):
+            msg = "hello" if args.same_message else f"client {cid} message {i}"
+            t0 = time.perf_counter()
+            try:
+                r = await client.post("/chat", json={"user_id": f"rest-{cid % args.users}", "message": msg})
+                r.raise_for_status()
+                out["chat"].append(time.perf_counter() - t0)
+            except Exception:
+                out["errors"]["chat"] += 1
+                continue
+            t0 = time.perf_counter()
+            try:
+                (await client.get(f"/history/rest-{cid % args.users}")).raise_for_status()
+                out["history"].append(time.perf_counter() - t0)
+            except Exception:
+                out["errors"]["history"] += 1
+
+async def ws_client(base, cid, args, out):
+    url = base.replace("http", "ws") + f"/ws/ws-{cid % args.users}"
+    done = 0
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            for i in range(args.requests):
+                msg = "hello" if args.same_message else f"client {cid} message {i}"
+                t0 = time.perf_counter()
+                await ws.send(msg)
+                received, first = 0, None
+                while received < args.tokens * 4:  # SimBrain sends "tok " per token
+                    frame = await ws.recv()
+                    first = first or time.perf_counter()
+                    received += len(frame)
+                out["ws_ttft"].append(first - t0)
+                out["ws"].append(time.perf_counter() - t0)
+                done += 1
+    except Exception:
+        out["errors"]["ws"] += args.requests - done  # the connection is gone: the rest never ran
+
+async def drive(base, args):
+    out = {"chat": [], "history": [], "ws": [], "ws_ttft": [], "errors": {"chat": 0, "history": 0, "ws": 0}}
+    t0 = time.perf_counter()
+    await asyncio.gather(
+        *(rest_client(base, c, args, out) for c in range(args.rest_clients)),
+        *(ws_client(base, c, args, out) for c in range(args.ws_clients)),
+    )
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser(description="Local load test for weBot REST and WebSocket paths")
+    ap.add_argument("--rest-clients", type=int, default=50)
+    ap.add_argument("--ws-clients", type=int, default=50)
+    ap.add_argument("--requests", type=int, default=20, help="messages per client")
+    ap.add_argument("--users", type=int, default=1000, help="distinct user_ids per path")
+    ap.add_argument("--ttft-ms", type=float, default=150)
+    ap.add_argument("--sigma", type=float, default=0.5, help="log-normal spread of TTFT")
+    ap.add_argument("--tokens", type=int, default=40)
+    ap.add_argument("--token-rate", type=float, default=200, help="tokens/s per stream")
+    ap.add_argument("--same-message", action="store_true", help="every client sends the same text")
+    ap.add_argument("--no-metrics", action="store_true", help="disable metrics/tracing to measure their overhead")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    import app as webot
+    import metrics
+    metrics.REGISTRY.enabled = not args.no_metrics
+    webot.BRAIN = SimBrain(args.ttft_ms, args.sigma, args.tokens, args.token_rate)
+    server, port = start_server(webot.app)
+    rss_before = rss_mb()
+    out, elapsed = asyncio.run(drive(f"http://127.0.0.1:{port}", args))
+    rss_after = rss_mb()
+    server.should_exit = True
+
+    rows = [
+        summarize("POST /chat", out["chat"], [], out["errors"]["chat"], elapsed),
+        summarize("GET /history", out["history"], [], out["errors"]["history"], elapsed),
+        summarize("WS /ws", out["ws"], out["ws_ttft"], out["errors"]["ws"], elapsed),
+    ]
+    report = {"metrics": metrics.REGISTRY.enabled, "elapsed_s": elapsed, "rss_mb_before": rss_before, "rss_mb_after": rss_after,
+              "rss_growth_mb": rss_after - rss_before, "conversations": len(webot.STORE), "paths": rows}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    fmt = lambda v: "-" if v is None else f"{v:.1f}"
+    print(f"{'path':<14}{'reqs':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'ttft99':>9}  (ms)")
+    for r in rows:
+        print(f"{r['path']:<14}{r['requests']:>7}{r['errors']:>5}{r['rps']:>9.1f}"
+              f"{fmt(r['p50_ms']):>9}{fmt(r['p95_ms']):>9}{fmt(r['p99_ms']):>9}"
+              f"{fmt(r.get('ttft_p50_ms')):>9}{fmt(r.get('ttft_p99_ms')):>9}")
+    print(f"elapsed {elapsed:.2f}s, RSS {rss_before:.1f} -> {rss_after:.1f} MB "
+          f"({rss_after - rss_before:+.1f}), conversations held: {report['conversations']}, "
+          f"metrics {'on' if report['metrics'] else 'off'}")
+
+if __name__ == "__main__":
+    main()
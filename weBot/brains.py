@@ -1,7 +1,8 @@
 # brains.py
-import os, time, json
+import os, time, json, asyncio, threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Iterable, Optional
+from typing import List, Dict, Any, Iterable, AsyncIterator, Callable, Optional
+from metrics import span
 
 Message = Dict[str, Any] # {"role": "user"|"bot", "text": "...", "ts": float}
 
@@ -12,6 +13,50 @@ class Brain(ABC):
     def stream_reply(self, history: List[Message], user_input: str) -> Iterable[str]:
         yield self.reply(history, user_input)
 
+    # Async streaming for the event loop. Sync brains get a thread-pool bridge
+    # so blocking I/O never runs on the loop; native async brains override this.
+    def astream_reply(self, history: List[Message], user_input: str) -> AsyncIterator[str]:
+        return iterate_in_thread(lambda: self.stream_reply(history, user_input))
+
+# Canned replies for failed upstream calls; wrappers use is_error_reply to avoid caching them
+def error_reply(source: str, e: BaseException) -> str:
+    return f"({source} error: {type(e).__name__}) Please try again."
+
+def is_error_reply(text: str) -> bool:
+    return text.startswith("(") and " error: " in text[:64] and text.endswith("Please try again.")
+
+_DONE = object()
+
+async def iterate_in_thread(make_iter: Callable[[], Iterable[str]]) -> AsyncIterator[str]:
+    """Drive a blocking iterator on the default executor and yield its items on the loop."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def pump():
+        try:
+            for item in make_iter():
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+    loop.run_in_executor(None, pump)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # consumer went away (disconnect/cancel): let the worker stop early
+        stop.set()
+
 # Simple fallback brain (kept for local tests)
 class RulesBrain(Brain):
     def reply(self, history, user_input):
@@ -24,29 +69,35 @@ class RulesBrain(Brain):
 # Groq (cloud)
 # Docs: https://console.groq.com
 class GroqBrain(Brain):
-    def __init__(self, model: Optional[str] = None, timeout: int = 60):
-        from groq import Groq
+    # strict=True: let errors propagate (and disable the SDK's own retries) so a
+    # wrapping BrainPool can retry/back off; otherwise reply() returns a canned error.
+    def __init__(self, model: Optional[str] = None, timeout: int = 60, strict: bool = False):
+        from groq import Groq, AsyncGroq
+        from context import ContextWindow
         key = os.getenv("GROQ_API_KEY")
         if not key:
             raise RuntimeError("GROQ_API_KEY is not set.")
-        self.client = Groq(api_key=key, timeout=timeout)
+        retries = {"max_retries": 0} if strict else {}
+        self.client = Groq(api_key=key, timeout=timeout, **retries)
+        self.aclient = AsyncGroq(api_key=key, timeout=timeout, **retries)
+        self.strict = strict
         self.model = model or os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
         # can be tweak defaults via env:
         # MODEL_TEMP (float), MODEL_TOP_P (float), MODEL_MAX_TOKENS (int)
         self.temp = float(os.getenv("MODEL_TEMP", "0.7"))
         self.top_p = float(os.getenv("MODEL_TOP_P", "0.95"))
         self.max_tokens = int(os.getenv("MODEL_MAX_TOKENS", "512"))
+        # prompt history budget: CONTEXT_MAX_TOKENS (int), CONTEXT_SUMMARY_TOKENS (int, 0 = no summary)
+        self.window = ContextWindow.from_env()
+        # prepend a system prompt via env (read once)
+        sys_prompt = os.getenv("SYSTEM_PROMPT", "").strip()
+        self._system = [{"role": "system", "content": sys_prompt}] if sys_prompt else []
 
+    # Only the most recent turns that fit the token budget. Store-backed histories
+    # carry a pre-converted buffer, so this is O(kept turns), not O(history).
     def _to_messages(self, history: List[Message], user_input: str):
-        msgs = []
-        # prepend a system prompt via env
-        sys_prompt = os.getenv("SYSTEM_PROMPT", "").strip()
-        if sys_prompt:
-            msgs.append({"role": "system", "content": sys_prompt})
-        for m in history:
-            role = "assistant" if m["role"] == "bot" else "user"
-            msgs.append({"role": role, "content": m["text"]})
-        return msgs
+        with span("to_messages"):
+            return self._system + self.window.build(history)
 
     def reply(self, history: List[Message], user_input: str) -> str:
         try:
@@ -60,7 +111,9 @@ class GroqBrain(Brain):
             )
             return (res.choices[0].message.content or "").strip()
         except Exception as e:
-            return f"(Groq error: {type(e).__name__}) Please try again."
+            if self.strict:
+                raise
+            return error_reply("Groq", e)
 
 
     # Token streaming for WebSocket
@@ -74,7 +127,27 @@ class GroqBrain(Brain):
             max_tokens=self.max_tokens,
             stream=True,
         )
-        for chunk in stream:
-            delta = chunk.choices[0].delta.content or ""
-            if delta:
-                yield delta
+        with stream:  # closing the generator early releases the upstream response
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    yield delta
+
+    # Native async streaming: no thread per connection, the loop stays free
+    async def astream_reply(self, history: List[Message], user_input: str) -> AsyncIterator[str]:
+        msgs = self._to_messages(history, user_input)
+        stream = await self.aclient.chat.completions.create(
+            model=self.model,
+            messages=msgs,
+            temperature=self.temp,
+            top_p=self.top_p,
+            max_tokens=self.max_tokens,
+            stream=True,
+        )
+        # a cancelled caller (disconnect, SingleFlight, hedging loser) closes this
+        # generator; leaving the block closes the HTTP response instead of leaking it
+        async with stream:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    yield delta
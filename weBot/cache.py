@@ -0,0 +1,151 @@
+# cache.py
+import os, re, time, hashlib, threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Iterable, List, Optional
+from brains import Brain, Message, is_error_reply
+from context import chain_digest
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters."""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = self.misses = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+# Keys
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+def normalize(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form: "Hello,  there!" -> "hello there"."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", text.lower())).strip()
+
+def _recent(history, n: int) -> List[Message]:
+    if n <= 0:
+        return []
+    tail = getattr(history, "tail", None)  # store Conversation views: no full copy
+    return tail(n) if tail else list(history)[-n:]
+
+def cache_key(history, user_input: str, context_turns: int = 2) -> str:
+    """Normalized input plus a hash of the last `context_turns` prior messages (truncated)."""
+    recent = _recent(history, context_turns + 1)
+    # app.py records the user message before asking the brain; don't count it twice
+    if recent and recent[-1]["role"] == "user" and recent[-1]["text"] == user_input:
+        recent = recent[:-1]
+    recent = recent[-context_turns:] if context_turns else []
+    h = hashlib.blake2b(digest_size=12)
+    for m in recent:
+        h.update(f"{m['role']}\x1f{normalize(m['text'])[:200]}\x1e".encode())
+    return f"{normalize(user_input)}|{h.hexdigest()}"
+
+def prompt_key(history, user_input: str) -> str:
+    """Exact upstream input: the whole history, verbatim, plus the input.
+
+    Two requests share a key only if the brain would be sent the same prompt, so
+    requests of different users coalesce only when their whole context matches.
+    Store-backed histories carry a rolling digest, so this is O(1) per turn.
+    """
+    buffer = getattr(history, "buffer", None)
+    if buffer is not None:
+        digest, last_seq = buffer.digest, buffer.last_seq
+    else:
+        digest, last_seq = b"", None
+        for m in history:
+            digest, last_seq = chain_digest(digest, m), m.get("seq")
+    h = hashlib.blake2b(digest, digest_size=16)
+    h.update(user_input.encode())
+    return f"{last_seq}:{h.hexdigest()}"
+
+# Brain wrapper
+class CachedBrain(Brain):
+    """Serves repeated prompts from a TTLCache; hits replay as a synthetic chunked stream."""
+
+    def __init__(self, inner: Brain, cache: Optional[TTLCache] = None, context_turns: int = 2, chunk_chars: int = 16):
+        self.inner = inner
+        self.cache = cache or TTLCache()
+        self.context_turns = context_turns
+        self.chunk_chars = chunk_chars
+
+    @classmethod
+    def from_env(cls, inner: Brain) -> "CachedBrain":
+        return cls(
+            inner,
+            TTLCache(int(os.getenv("CACHE_SIZE", "1024")), float(os.getenv("CACHE_TTL", "600"))),
+            context_turns=int(os.getenv("CACHE_CONTEXT_TURNS", "2")),
+        )
+
+    def _chunks(self, text: str) -> Iterable[str]:
+        n = self.chunk_chars
+        return (text[i:i + n] for i in range(0, len(text), n))
+
+    def _store(self, key: str, text: str):
+        if text and not is_error_reply(text):
+            self.cache.set(key, text)
+
+    def reply(self, history, user_input):
+        key = cache_key(history, user_input, self.context_turns)
+        hit = self.cache.get(key)
+        if hit is not None:
+            return hit
+        text = self.inner.reply(history, user_input)
+        self._store(key, text)
+        return text
+
+    def stream_reply(self, history, user_input):
+        key = cache_key(history, user_input, self.context_turns)
+        hit = self.cache.get(key)
+        if hit is not None:
+            yield from self._chunks(hit)
+            return
+        parts = []
+        for token in self.inner.stream_reply(history, user_input):
+            parts.append(token)
+            yield token
+        # only complete streams are cached
+        self._store(key, "".join(parts))
+
+    async def astream_reply(self, history, user_input) -> AsyncIterator[str]:
+        key = cache_key(history, user_input, self.context_turns)
+        hit = self.cache.get(key)
+        if hit is not None:
+            for chunk in self._chunks(hit):
+                yield chunk
+            return
+        parts = []
+        async for token in self.inner.astream_reply(history, user_input):
+            parts.append(token)
+            yield token
+        self._store(key, "".join(parts))
+
+    def stats(self) -> dict:
+        return self.cache.stats()
@@ -0,0 +1,74 @@
+# coalesce.py
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+class _Flight:
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.wake = asyncio.Event()  # replaced after every token
+        self.task: Optional[asyncio.Task] = None
+
+    def publish(self):
+        wake, self.wake = self.wake, asyncio.Event()
+        wake.set()
+
+class SingleFlight:
+    """Deduplicates identical in-flight streams: one upstream call per key, fanned out to every subscriber.
+
+    Late joiners replay the tokens produced so far, then follow live. The upstream
+    call is cancelled once the last subscriber goes away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0  # upstream calls made
+        self.joined = 0   # callers served by an existing flight
+
+    def __len__(self):
+        return len(self._flights)
+
+    async def stream(self, key: str, start: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._run(key, flight, start))
+            self.started += 1
+        else:
+            self.joined += 1
+        flight.subscribers += 1
+        i = 0
+        try:
+            while True:
+                while i < len(flight.tokens):
+                    yield flight.tokens[i]
+                    i += 1
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await flight.wake.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # nobody is listening anymore: drop the upstream call
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _run(self, key: str, flight: _Flight, start: Callable[[], AsyncIterator[str]]):
+        try:
+            async for token in start():
+                flight.tokens.append(token)
+                flight.publish()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            self._forget(key, flight)
+            flight.publish()
@@ -0,0 +1,134 @@
+# context.py
+import os, re, hashlib
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from brains import Message
+
+ChatMessage = Dict[str, str] # {"role": "user"|"assistant"|"system", "content": "..."}
+
+# Per-message framing overhead (role, separators) in chat-completion prompts
+MESSAGE_OVERHEAD = 4
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s")
+
+# Fast local estimate, close to BPE counts for English: one token per word or
+# punctuation mark, long words split every ~4 chars. Cached per text so a turn
+# only tokenizes the newest message.
+@lru_cache(maxsize=65536)
+def estimate_tokens(text: str) -> int:
+    return sum(1 + (len(t) - 1) // 4 for t in _TOKEN_RE.findall(text)) + MESSAGE_OVERHEAD
+
+def chain_digest(digest: bytes, m: Message) -> bytes:
+    """Rolling hash step: equal digests mean the same messages in the same order."""
+    return hashlib.blake2b(digest + f"{m['role']}\x1f{m['text']}\x1e".encode(), digest_size=16).digest()
+
+def to_chat_message(m: Message) -> ChatMessage:
+    return {"role": "assistant" if m["role"] == "bot" else "user", "content": m["text"]}
+
+class MessageBuffer:
+    """Append-only, pre-converted chat messages of one conversation with prefix token sums.
+
+    The store appends to it as messages arrive, so building a prompt never re-walks
+    or re-converts the history: the window start is a bisect over the prefix sums.
+    """
+
+    def __init__(self, max_len: Optional[int] = None):
+        self.max_len = max_len
+        self._msgs: List[ChatMessage] = []
+        self._cum = [0]  # _cum[i] = tokens in _msgs[:i]
+        self._start = 0  # messages before this index were trimmed by max_len
+        self._summary_key, self._summary = None, ""
+        self.digest = b""  # chain_digest over every message appended, trimmed ones included
+        self.last_seq: Optional[int] = None
+
+    def __len__(self):
+        return len(self._msgs) - self._start
+
+    def append(self, m: Message):
+        self._msgs.append(to_chat_message(m))
+        self._cum.append(self._cum[-1] + estimate_tokens(m["text"]))
+        self.digest = chain_digest(self.digest, m)
+        self.last_seq = m.get("seq")
+        if self.max_len is not None and len(self) > self.max_len:
+            self._start += 1
+            # compact once the trimmed prefix is as long as the window: memory stays
+            # within 2 * max_len and trimming amortized O(1)
+            if self._start >= self.max_len:
+                del self._msgs[:self._start], self._cum[:self._start]
+                self._summary_key = None
+                self._start = 0
+
+    def window(self, max_tokens: int) -> Tuple[int, List[ChatMessage]]:
+        """Returns (index of the first kept message, kept messages); the newest is always kept."""
+        end = len(self._msgs)
+        if end == self._start:
+            return end, []
+        lo = bisect_left(self._cum, self._cum[end] - max_tokens, self._start, end)
+        lo = min(lo, end - 1)
+        return lo, self._msgs[lo:end]
+
+    def summary(self, window: "ContextWindow", upto: int) -> str:
+        # rolling: only recomputed when the window start moves
+        key = (upto, window.summary_tokens)
+        if key != self._summary_key:
+            self._summary_key = key
+            self._summary = window.summarize(self._msgs[max(self._start, upto - 64):upto])
+        return self._summary
+
+class ContextWindow:
+    """Keeps the most recent turns that fit `max_tokens`; optionally folds the rest into a summary."""
+
+    def __init__(self, max_tokens: int = 3000, summary_tokens: int = 0):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+
+    @classmethod
+    def from_env(cls) -> "ContextWindow":
+        return cls(
+            max_tokens=int(os.getenv("CONTEXT_MAX_TOKENS", "3000")),
+            summary_tokens=int(os.getenv("CONTEXT_SUMMARY_TOKENS", "0")),
+        )
+
+    def build(self, history) -> List[ChatMessage]:
+        """Chat messages for the prompt: optional summary, then the kept turns."""
+        buffer: Optional[MessageBuffer] = getattr(history, "buffer", None)
+        if buffer is not None:
+            start, kept = buffer.window(self.max_tokens - self.summary_tokens)
+            summary = buffer.summary(self, start) if self.summary_tokens and start > 0 else ""
+        else:
+            dropped, kept_src = self.select(list(history))
+            kept = [to_chat_message(m) for m in kept_src]
+            summary = self.summarize(dropped) if self.summary_tokens and dropped else ""
+        return ([{"role": "system", "content": summary}] if summary else []) + kept
+
+    def select(self, history: List[Message]) -> Tuple[List[Message], List[Message]]:
+        """Split history into (dropped, kept). The newest message is always kept."""
+        budget = self.max_tokens - self.summary_tokens
+        used, start = 0, len(history)
+        while start > 0:
+            cost = estimate_tokens(history[start - 1]["text"])
+            if used + cost > budget and start < len(history):
+                break
+            used += cost
+            start -= 1
+        return history[:start], history[start:]
+
+    def summarize(self, dropped) -> str:
+        """Extractive rolling summary: first sentence of the latest dropped turns, within budget.
+
+        Accepts store messages (role/text) or chat messages (role/content).
+        """
+        parts, used = [], 0
+        for m in reversed(dropped):
+            text = m["text"] if "text" in m else m["content"]
+            first = _SENTENCE_RE.split(text.strip(), 1)[0][:200]
+            line = f"{'Bot' if m['role'] in ('bot', 'assistant') else 'User'}: {first}"
+            cost = estimate_tokens(line)
+            if used + cost > self.summary_tokens:
+                break
+            parts.append(line)
+            used += cost
+        if not parts:
+            return ""
+        return "Summary of earlier conversation:\n" + "\n".join(reversed(parts))
@@ -0,0 +1,75 @@
+# frames.py
+import asyncio, time
+from typing import Awaitable, Callable, List, Optional
+
+class FrameCoalescer:
+    """Batches streamed tokens into WebSocket frames.
+
+    A frame is sent once `max_chars` are buffered OR `max_latency` seconds after the
+    first buffered token, whichever comes first, so slow streams are never held back.
+    Bigger frames mean fewer sends; a shorter deadline means a lower time-to-first-byte.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], max_chars: int = 64, max_latency: float = 0.03):
+        self.send = send
+        self.max_chars = max_chars
+        self.max_latency = max_latency
+        self._buf: List[str] = []
+        self._len = 0  # running length of _buf
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()  # keeps timer and size flushes from interleaving sends
+        self.begin()
+
+    def begin(self):
+        """Reset per-reply metrics; call when a new reply starts streaming."""
+        self.started = time.perf_counter()
+        self.first_frame_at: Optional[float] = None
+        self.frames = 0
+        self.chars = 0
+
+    async def push(self, token: str):
+        self._buf.append(token)
+        self._len += len(token)
+        if self._len >= self.max_chars:
+            await self.flush()
+        elif self._timer is None and self.max_latency > 0:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_latency)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._buf:
+                return
+            text = "".join(self._buf)
+            self._buf, self._len = [], 0
+            await self.send(text)
+            if self.first_frame_at is None:
+                self.first_frame_at = time.perf_counter()
+            self.frames += 1
+            self.chars += len(text)
+
+    async def close(self):
+        await self.flush()
+
+    def cancel(self):
+        """Drop pending text without sending (the socket is gone)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._buf, self._len = [], 0
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "frames": self.frames,
+            "chars": self.chars,
+            "frames_per_sec": self.frames / elapsed if elapsed > 0 else 0.0,
+            "ttfb_ms": (self.first_frame_at - self.started) * 1000 if self.first_frame_at else None,
+        }
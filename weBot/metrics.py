@@ -0,0 +1,208 @@
+# metrics.py
+# Minimal Prometheus-style metrics (text exposition format 0.0.4) and per-request
+# stage tracing. No dependencies; an observation is a lock + a bisect.
+import os, time, json, logging, threading, contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger("weBot.trace")
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        return []
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in list(self._values.items())]
+
+class Gauge(_Metric):
+    """Set/inc/dec gauge; with `fn` the value(s) are read at scrape time instead.
+
+    `fn` returns a number, or a list of (label values, number) for labelled gauges.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), fn: Optional[Callable] = None):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple, float] = {}
+        self.fn = fn
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, amount: float = 1.0, *labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, *labels):
+        self.inc(-amount, *labels)
+
+    def _samples(self):
+        items = list(self._values.items())
+        if self.fn is not None:
+            value = self.fn()
+            items = value if isinstance(value, list) else [((), value)]
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def _samples(self):
+        out = []
+        for k, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, k, le)} {cumulative}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, k)} {series[-1]}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, k)} {cumulative}")
+        return out
+
+class Registry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *a, **kw) -> Counter:
+        return self.register(Counter(*a, **kw))
+
+    def gauge(self, *a, **kw) -> Gauge:
+        return self.register(Gauge(*a, **kw))
+
+    def histogram(self, *a, **kw) -> Histogram:
+        return self.register(Histogram(*a, **kw))
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+# METRICS=0 turns every observation into a no-op (the /metrics endpoint stays up)
+REGISTRY = Registry(enabled=os.getenv("METRICS", "1") == "1")
+STAGE_SECONDS = REGISTRY.histogram("weBot_stage_seconds", "Time spent per request stage", ["stage"])
+
+# Tracing
+# TRACE_LOG=1 logs one JSON line per request with the time spent in each stage.
+TRACE_LOG = os.getenv("TRACE_LOG", "0") == "1"
+_current: contextvars.ContextVar = contextvars.ContextVar("weBot_trace", default=None)
+
+class Trace:
+    def __init__(self, route: str):
+        self.route = route
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def finish(self, **fields):
+        if TRACE_LOG:
+            total = time.perf_counter() - self.started
+            log.info(json.dumps({
+                "route": self.route,
+                "total_ms": round(total * 1000, 3),
+                **{f"{k}_ms": round(v * 1000, 3) for k, v in self.stages.items()},
+                **fields,
+            }))
+
+def start_trace(route: str) -> Trace:
+    trace = Trace(route)
+    _current.set(trace)
+    return trace
+
+def record(stage: str, seconds: float):
+    if not REGISTRY.enabled:
+        return
+    STAGE_SECONDS.observe(seconds, stage)
+    trace = _current.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+@contextmanager
+def span(stage: str):
+    if not REGISTRY.enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - t0)
+
+# ASGI middleware: request latency per route template and status
+HTTP_SECONDS = REGISTRY.histogram("weBot_http_request_duration_seconds", "HTTP request latency", ["route", "method", "status"])
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not REGISTRY.enabled:
+            return await self.app(scope, receive, send)
+        status = 500
+        trace = start_trace(scope["path"])
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "static"  # templated, bounded cardinality
+            HTTP_SECONDS.observe(time.perf_counter() - trace.started, route, scope["method"], status)
+            trace.route = route
+            trace.finish(status=status)
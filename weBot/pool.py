@@ -0,0 +1,244 @@
+# pool.py
+import os, time, random, asyncio, threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import AsyncIterator, Optional
+from brains import Brain, error_reply
+
+class PoolFull(RuntimeError):
+    """All slots are busy and the wait queue is at max depth; callers should answer 503."""
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+def _status(e: BaseException) -> Optional[int]:
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return status
+
+def is_retryable(e: BaseException) -> bool:
+    # connection errors/timeouts carry no status and are worth another try
+    status = _status(e)
+    return status is None or status in RETRYABLE_STATUS
+
+def retry_after(e: BaseException) -> Optional[float]:
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class BrainPool(Brain):
+    """Concurrency limit, bounded wait queue, retries with jittered backoff and optional hedging.
+
+    `max_concurrency` calls run at once, at most `max_queue` more wait for a slot and
+    anything beyond that fails fast with PoolFull. Failed calls are retried before the
+    first token only, honoring Retry-After. With `hedge_after` set, a second identical
+    call is started when the first has produced nothing by then; the first to answer wins.
+    The sync and async paths each get `max_concurrency` slots.
+    """
+
+    def __init__(self, inner: Brain, max_concurrency: int = 8, max_queue: int = 64, retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 8.0, hedge_after: Optional[float] = None):
+        self.inner = inner
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._hedge_pool = ThreadPoolExecutor(max_workers=max_concurrency * 2) if hedge_after else None
+        self._lock = threading.Lock()
+        self.active = self.waiting = 0
+        self.rejected = self.retried = self.hedged = 0
+        self._wait_total, self._wait_count, self._wait_max = 0.0, 0, 0.0
+
+    @classmethod
+    def from_env(cls, inner: Brain) -> "BrainPool":
+        hedge_ms = float(os.getenv("POOL_HEDGE_MS", "0"))
+        return cls(
+            inner,
+            max_concurrency=int(os.getenv("POOL_MAX_CONCURRENCY", "8")),
+            max_queue=int(os.getenv("POOL_MAX_QUEUE", "64")),
+            retries=int(os.getenv("POOL_RETRIES", "3")),
+            hedge_after=hedge_ms / 1000 if hedge_ms > 0 else None,
+        )
+
+    # Queue accounting
+    def _enqueue(self):
+        with self._lock:
+            if self.active >= self.max_concurrency and self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise PoolFull(f"brain pool saturated ({self.active} active, {self.waiting} queued)")
+            self.waiting += 1
+        return time.perf_counter()
+
+    def _admitted(self, queued_at: float):
+        waited = time.perf_counter() - queued_at
+        with self._lock:
+            self.waiting -= 1
+            self.active += 1
+            self._wait_total += waited
+            self._wait_count += 1
+            self._wait_max = max(self._wait_max, waited)
+
+    def _dequeued(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def _released(self):
+        with self._lock:
+            self.active -= 1
+
+    def _delay(self, attempt: int, e: BaseException) -> float:
+        hinted = retry_after(e)
+        if hinted is not None:
+            return min(hinted, self.max_backoff)
+        # "equal jitter": half fixed, half random, so retries from a burst spread out
+        base = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return base / 2 + random.uniform(0, base / 2)
+
+    def _should_retry(self, attempt: int, e: BaseException) -> bool:
+        if attempt >= self.retries or not is_retryable(e):
+            return False
+        with self._lock:
+            self.retried += 1
+        return True
+
+    # Sync path
+    def _call_sync(self, history, user_input) -> str:
+        if not self._hedge_pool:
+            return self.inner.reply(history, user_input)
+        futures = {self._hedge_pool.submit(self.inner.reply, history, user_input)}
+        done, _ = wait(futures, timeout=self.hedge_after)
+        if not done:
+            with self._lock:
+                self.hedged += 1
+            futures.add(self._hedge_pool.submit(self.inner.reply, history, user_input))
+        error: Optional[BaseException] = None
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    for loser in futures:
+                        loser.cancel()
+                    return f.result()
+                error = f.exception()
+        raise error
+
+    def reply(self, history, user_input):
+        queued_at = self._enqueue()
+        self._sync_slots.acquire()
+        self._admitted(queued_at)
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    return self._call_sync(history, user_input)
+                except Exception as e:
+                    if not self._should_retry(attempt, e):
+                        return error_reply("Upstream", e)
+                    time.sleep(self._delay(attempt, e))
+        finally:
+            self._released()
+            self._sync_slots.release()
+
+    def stream_reply(self, history, user_input):
+        queued_at = self._enqueue()
+        self._sync_slots.acquire()
+        self._admitted(queued_at)
+        try:
+            for attempt in range(self.retries + 1):
+                started = False
+                try:
+                    for token in self.inner.stream_reply(history, user_input):
+                        started = True
+                        yield token
+                    return
+                except Exception as e:
+                    if started or not self._should_retry(attempt, e):
+                        raise
+                    time.sleep(self._delay(attempt, e))
+        finally:
+            self._released()
+            self._sync_slots.release()
+
+    # Async path
+    async def _hedged_stream(self, history, user_input) -> AsyncIterator[str]:
+        if not self.hedge_after:
+            async for token in self.inner.astream_reply(history, user_input):
+                yield token
+            return
+        primary = self.inner.astream_reply(history, user_input)
+        pending = {asyncio.ensure_future(primary.__anext__()): primary}
+        done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+        if not done:
+            with self._lock:
+                self.hedged += 1
+            backup = self.inner.astream_reply(history, user_input)
+            pending[asyncio.ensure_future(backup.__anext__())] = backup
+        winner, first, error = None, None, None
+        while pending and winner is None:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                gen = pending.pop(fut)
+                exc = fut.exception()
+                if winner is None and (exc is None or isinstance(exc, StopAsyncIteration)):
+                    winner, first = gen, (None if exc else fut.result())
+                else:
+                    error = error or exc
+                    await gen.aclose()
+        for fut, gen in pending.items():  # the loser
+            fut.cancel()
+            try:
+                await fut
+            except BaseException:
+                pass
+            await gen.aclose()
+        if winner is None:
+            raise error
+        if first is None:
+            return
+        yield first
+        async for token in winner:
+            yield token
+
+    async def astream_reply(self, history, user_input) -> AsyncIterator[str]:
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        queued_at = self._enqueue()
+        try:
+            await self._async_slots.acquire()
+        except BaseException:
+            self._dequeued()
+            raise
+        self._admitted(queued_at)
+        try:
+            for attempt in range(self.retries + 1):
+                started = False
+                try:
+                    async for token in self._hedged_stream(history, user_input):
+                        started = True
+                        yield token
+                    return
+                except Exception as e:
+                    if started or not self._should_retry(attempt, e):
+                        raise
+                    await asyncio.sleep(self._delay(attempt, e))
+        finally:
+            self._released()
+            self._async_slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active,
+                "queued": self.waiting,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+                "retried": self.retried,
+                "hedged": self.hedged,
+                "avg_wait_ms": self._wait_total / self._wait_count * 1000 if self._wait_count else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+            }
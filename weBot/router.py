@@ -0,0 +1,160 @@
+# router.py
+import os, time, threading
+from typing import AsyncIterator, List, Optional, Tuple
+from brains import Brain, GroqBrain, RulesBrain, is_error_reply
+
+class CircuitBreaker:
+    """closed -> open after `failure_threshold` consecutive failures; one trial call after `reset_after` seconds."""
+
+    def __init__(self, failure_threshold: int = 3, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Could a call go through now? No state change: safe to ask while ranking backends."""
+        with self._lock:
+            return self.state == "closed" or time.monotonic() - self.opened_at >= self.reset_after
+
+    def acquire(self) -> bool:
+        """Call right before actually using the backend; starts the half-open trial if due."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            # open past its cool-down, or a half-open trial that never reported back
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_after:
+                self.state, self.opened_at = "half_open", now  # exactly one trial at a time
+                return True
+            return False
+
+    def success(self):
+        with self._lock:
+            self.state, self.failures = "closed", 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state, self.opened_at = "open", time.monotonic()
+
+class Backend:
+    """One routed brain with EWMAs of latency (time to first token) and error rate."""
+
+    def __init__(self, name: str, brain: Brain, alpha: float = 0.2, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.brain = brain
+        self.alpha = alpha
+        self.breaker = breaker or CircuitBreaker()
+        self.latency: Optional[float] = None  # unmeasured backends sort first, so they get probed
+        self.error_rate = 0.0
+
+    # seconds of latency a 100% error rate is worth: a backend that only ever failed
+    # has no latency sample, and must not rank like a fast one
+    error_penalty = 5.0
+
+    def score(self) -> float:
+        return (self.latency or 0.0) * (1 + 4 * self.error_rate) + self.error_penalty * self.error_rate
+
+    def observe(self, latency: Optional[float], ok: bool):
+        a = self.alpha
+        self.error_rate = (1 - a) * self.error_rate + a * (0.0 if ok else 1.0)
+        if latency is not None:
+            self.latency = latency if self.latency is None else (1 - a) * self.latency + a * latency
+        self.breaker.success() if ok else self.breaker.failure()
+
+class RouterBrain(Brain):
+    """Routes each request to the healthiest, fastest backend and fails over until the first token.
+
+    Backends whose breaker is open are skipped; `fallback` (never circuit-broken) is tried
+    last. Once a token has been emitted the request is committed to that backend.
+    """
+
+    def __init__(self, backends: List[Tuple[str, Brain]], fallback: Optional[Brain] = None):
+        self.backends = [Backend(name, brain) for name, brain in backends]
+        self.fallback = fallback
+
+    @classmethod
+    def from_env(cls) -> "RouterBrain":
+        models = os.getenv("ROUTER_MODELS", "llama-3.1-8b-instant,llama-3.3-70b-versatile")
+        backends = [(m.strip(), GroqBrain(model=m.strip(), strict=True)) for m in models.split(",") if m.strip()]
+        return cls(backends, fallback=RulesBrain())
+
+    def _order(self) -> List[Backend]:
+        return sorted((b for b in self.backends if b.breaker.available()), key=Backend.score)
+
+    def reply(self, history, user_input):
+        for b in self._order():
+            if not b.breaker.acquire():
+                continue
+            t0 = time.perf_counter()
+            try:
+                text = b.brain.reply(history, user_input)
+            except Exception:
+                b.observe(None, ok=False)
+                continue
+            ok = not is_error_reply(text)
+            b.observe(time.perf_counter() - t0 if ok else None, ok)
+            if ok:
+                return text
+        if self.fallback is None:
+            raise RuntimeError("no healthy brain backend")
+        return self.fallback.reply(history, user_input)
+
+    def stream_reply(self, history, user_input):
+        for b in self._order():
+            if not b.breaker.acquire():
+                continue
+            t0 = time.perf_counter()
+            stream = iter(b.brain.stream_reply(history, user_input))
+            try:
+                first = next(stream, None)
+            except Exception:
+                b.observe(None, ok=False)
+                continue
+            b.observe(time.perf_counter() - t0, ok=True)
+            if first is not None:
+                yield first
+                yield from stream
+            return
+        if self.fallback is None:
+            raise RuntimeError("no healthy brain backend")
+        yield from self.fallback.stream_reply(history, user_input)
+
+    async def astream_reply(self, history, user_input) -> AsyncIterator[str]:
+        for b in self._order():
+            if not b.breaker.acquire():
+                continue
+            t0 = time.perf_counter()
+            stream = b.brain.astream_reply(history, user_input)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except Exception:
+                # nothing emitted yet: fail over to the next backend
+                b.observe(None, ok=False)
+                continue
+            b.observe(time.perf_counter() - t0, ok=True)
+            if first is not None:
+                yield first
+                async for token in stream:
+                    yield token
+            return
+        if self.fallback is None:
+            raise RuntimeError("no healthy brain backend")
+        async for token in self.fallback.astream_reply(history, user_input):
+            yield token
+
+    def stats(self) -> dict:
+        return {
+            b.name: {
+                "latency_ms": b.latency * 1000 if b.latency is not None else None,
+                "error_rate": round(b.error_rate, 3),
+                "circuit": b.breaker.state,
+            }
+            for b in self.backends
+        }
@@ -0,0 +1,115 @@
+# static.py
+# In-memory static files for the frontend. Every file in the directory is read once
+# at startup together with its gzip (and, if the brotli package is installed, br)
+# variant; requests pick a variant by Accept-Encoding and revalidate with strong
+# ETags. Everything is served "no-cache": always revalidated, usually a 304.
+import os, gzip, hashlib, mimetypes
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 256
+REVALIDATE = "no-cache"
+
+class Asset:
+    def __init__(self, body: bytes, content_type: str):
+        self.content_type = content_type
+        self.hash = hashlib.sha256(body).hexdigest()[:16]
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if content_type.startswith(COMPRESSIBLE) and len(body) >= MIN_COMPRESS_SIZE:
+            compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(body, quality=11)
+            # keep a variant only if it actually saves bytes
+            self.variants.update({k: v for k, v in compressed.items() if len(v) < len(body)})
+
+    def etag(self, encoding: str) -> str:
+        # strong and distinct per encoding: the representations differ byte for byte
+        return f'"{self.hash}"' if encoding == "identity" else f'"{self.hash}-{encoding}"'
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+def choose_encoding(asset: Asset, header: str) -> str:
+    accepted = accepted_encodings(header)
+    for encoding in ("br", "gzip"):  # smallest first
+        if encoding in asset.variants and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+class PrecompressedStatic:
+    """ASGI app serving `directory` from memory with precompressed variants and ETags."""
+
+    def __init__(self, directory: str, index: str = "index.html"):
+        self.directory = directory
+        self.index = index
+        self.assets: Dict[str, Asset] = {}
+        for root, _, files in os.walk(directory):
+            for name in files:
+                full = os.path.join(root, name)
+                with open(full, "rb") as f:
+                    body = f.read()
+                rel = os.path.relpath(full, directory).replace(os.sep, "/")
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if content_type.startswith("text/") or content_type == "application/javascript":
+                    content_type += "; charset=utf-8"
+                self.assets[rel] = Asset(body, content_type)
+
+    def lookup(self, path: str) -> Optional[Asset]:
+        path = path.lstrip("/")
+        if path == "" or path.endswith("/"):
+            path += self.index
+        return self.assets.get(path)
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        if scope["method"] not in ("GET", "HEAD"):
+            return await self._send(send, 405, [(b"allow", b"GET, HEAD")], b"Method Not Allowed")
+        asset = self.lookup(scope["path"])
+        if asset is None:
+            return await self._send(send, 404, [], b"Not Found")
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        encoding = choose_encoding(asset, headers.get("accept-encoding", ""))
+        etag = asset.etag(encoding)
+        common = [
+            (b"etag", etag.encode()),
+            (b"cache-control", REVALIDATE.encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return await self._send(send, 304, common)
+
+        body = asset.variants[encoding]
+        common.append((b"content-type", asset.content_type.encode()))
+        if encoding != "identity":
+            common.append((b"content-encoding", encoding.encode()))
+        await self._send(send, 200, common, body, head=scope["method"] == "HEAD")
+
+    @staticmethod
+    async def _send(send, status: int, headers, body: bytes = b"", head: bool = False):
+        if status != 304:
+            headers = headers + [(b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if head else body})
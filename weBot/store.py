@@ -0,0 +1,287 @@
+# store.py
+import os, time, sqlite3, threading
+from bisect import bisect_left, bisect_right
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+from brains import Message
+from context import MessageBuffer
+
+class ConversationStore(ABC):
+    blocking = False  # calls do I/O: async callers should run them in a thread
+    @abstractmethod
+    def append(self, user_id: str, message: Message) -> int: ...  # returns new context length; sets message["seq"]
+    @abstractmethod
+    def get(self, user_id: str, n: Optional[int] = None) -> List[Message]: ...  # oldest first
+    # Every stored message carries a "seq" that increases within a conversation; pages
+    # are the newest `limit` messages before seq `before`, or the oldest after `after`.
+    @abstractmethod
+    def page(self, user_id: str, limit: int, before: Optional[int] = None, after: Optional[int] = None) -> List[Message]: ...
+    @abstractmethod
+    def export(self, user_id: Optional[str] = None, chunk: int = 500) -> Iterator[List[Tuple[str, Message]]]: ...  # (user_id, message) chunks
+    @abstractmethod
+    def discard(self, user_id: str, seq: int) -> None: ...  # drop one message, e.g. a turn that never ran
+    @abstractmethod
+    def reset(self, user_id: str) -> None: ...
+    @abstractmethod
+    def clear(self) -> None: ...
+    @abstractmethod
+    def __len__(self) -> int: ...  # number of conversations held
+
+    # History handed to the brain. Stores that can keep it live return a view
+    # carrying a pre-converted MessageBuffer; the default is a plain copy.
+    def context(self, user_id: str) -> Sequence[Message]:
+        return self.get(user_id)
+
+def _seq(m: Message) -> int:
+    return m["seq"]
+
+class Conversation(Sequence):
+    """Live, bounded history of one user plus its incrementally maintained MessageBuffer."""
+
+    def __init__(self, max_messages: int, next_seq: int = 1):
+        self.messages: deque = deque(maxlen=max_messages)
+        self.buffer = MessageBuffer(max_len=max_messages)
+        self.next_seq = next_seq
+
+    def append(self, message: Message) -> int:
+        seq = message["seq"] = self.next_seq
+        self.next_seq += 1
+        message = dict(message)
+        self.messages.append(message)
+        self.buffer.append(message)
+        return seq
+
+    def discard(self, seq: int):
+        kept = [m for m in self.messages if m["seq"] != seq]
+        if len(kept) == len(self.messages):
+            return
+        # rare (a rejected turn): rebuild rather than complicate the append path
+        self.messages = deque(kept, maxlen=self.messages.maxlen)
+        self.buffer = MessageBuffer(max_len=self.buffer.max_len)
+        for m in kept:
+            self.buffer.append(m)
+
+    def page(self, limit: int, before: Optional[int] = None, after: Optional[int] = None) -> List[Message]:
+        # seqs increase but may have gaps (discarded messages): bisect for the cursor
+        if after is not None:
+            start = bisect_right(self.messages, after, key=_seq)
+            return list(islice(self.messages, start, start + limit))
+        end = len(self.messages) if before is None else bisect_left(self.messages, before, key=_seq)
+        return list(islice(self.messages, max(end - limit, 0), end))
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self.messages)[i]
+        return self.messages[i]
+
+    def tail(self, n: int) -> List[Message]:
+        # islice over a reversed deque: O(n), independent of history length
+        return list(islice(reversed(self.messages), n))[::-1]
+
+# In-process LRU/TTL store (default)
+# Each user keeps at most `max_messages`; at most `max_users` conversations are held,
+# and conversations idle longer than `ttl` seconds are evicted.
+class MemoryStore(ConversationStore):
+    def __init__(self, max_messages: int = 200, max_users: int = 10_000, ttl: Optional[float] = 24 * 3600):
+        self.max_messages = max_messages
+        self.max_users = max_users
+        self.ttl = ttl
+        self._convs: "OrderedDict[str, Conversation]" = OrderedDict()  # least recently used first
+        self._seen: dict = {}
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        # OrderedDict is kept in recency order, so expired entries sit at the front
+        while self._convs:
+            oldest = next(iter(self._convs))
+            if len(self._convs) > self.max_users or (self.ttl is not None and now - self._seen[oldest] > self.ttl):
+                del self._convs[oldest], self._seen[oldest]
+            else:
+                break
+
+    def _touch(self, user_id: str, create: bool) -> Optional[Conversation]:
+        now = time.time()
+        conv = self._convs.get(user_id)
+        if conv is None and create:
+            conv = self._convs[user_id] = Conversation(self.max_messages)
+        if conv is not None:
+            self._convs.move_to_end(user_id)
+            self._seen[user_id] = now
+        self._evict(now)
+        return conv
+
+    def append(self, user_id, message):
+        with self._lock:
+            conv = self._touch(user_id, create=True)
+            conv.append(message)
+            return len(conv)
+
+    def get(self, user_id, n=None):
+        with self._lock:
+            conv = self._touch(user_id, create=False)
+            if not conv:
+                return []
+            return list(conv) if n is None else conv.tail(n) if n > 0 else []
+
+    def page(self, user_id, limit, before=None, after=None):
+        with self._lock:
+            conv = self._touch(user_id, create=False)
+            return conv.page(limit, before, after) if conv and limit > 0 else []
+
+    def export(self, user_id=None, chunk=500):
+        with self._lock:
+            users = [user_id] if user_id is not None else list(self._convs)
+        for uid in users:
+            after = 0
+            while True:
+                with self._lock:  # copy one chunk at a time; appends may continue meanwhile
+                    conv = self._convs.get(uid)
+                    batch = conv.page(chunk, after=after) if conv else []
+                if not batch:
+                    break
+                yield [(uid, m) for m in batch]
+                after = batch[-1]["seq"]
+
+    def context(self, user_id):
+        with self._lock:
+            return self._touch(user_id, create=True)
+
+    def discard(self, user_id, seq):
+        with self._lock:
+            conv = self._convs.get(user_id)
+            if conv is not None:
+                conv.discard(seq)
+
+    def reset(self, user_id):
+        with self._lock:
+            conv = self._convs.get(user_id)
+            if conv is not None:
+                # empty, but seqs keep increasing: cursors issued before the reset stay valid
+                self._convs[user_id] = Conversation(self.max_messages, next_seq=conv.next_seq)
+
+    def clear(self):
+        with self._lock:
+            self._convs.clear()
+            self._seen.clear()
+
+    def __len__(self):
+        return len(self._convs)
+
+# SQLite (WAL) store, shareable by several uvicorn workers on one host
+class SQLiteStore(ConversationStore):
+    blocking = True
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        role TEXT NOT NULL,
+        text TEXT NOT NULL,
+        ts REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_messages_user ON messages(user_id, id);
+    """
+
+    def __init__(self, path: str = "weBot.db", max_messages: int = 200):
+        self.path = path
+        self.max_messages = max_messages
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    # one connection per thread; WAL lets readers and the writer run concurrently
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, user_id, message):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            message["seq"] = conn.execute(
+                "INSERT INTO messages (user_id, role, text, ts) VALUES (?, ?, ?, ?)",
+                (user_id, message["role"], message["text"], message.get("ts", time.time())),
+            ).lastrowid
+            # cap per-user history
+            conn.execute(
+                """DELETE FROM messages WHERE user_id = ? AND id <= (
+                       SELECT id FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)""",
+                (user_id, user_id, self.max_messages),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM messages WHERE user_id = ?", (user_id,)).fetchone()
+        return count
+
+    # the AUTOINCREMENT id doubles as seq: it only grows, per user as well as globally
+    def get(self, user_id, n=None):
+        limit = -1 if n is None else max(n, 0)
+        rows = self._conn().execute(
+            "SELECT id, role, text, ts FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+            (user_id, limit),
+        ).fetchall()
+        return [{"role": r, "text": t, "ts": ts, "seq": i} for i, r, t, ts in reversed(rows)]
+
+    def page(self, user_id, limit, before=None, after=None):
+        if limit <= 0:
+            return []
+        if after is not None:
+            rows = self._conn().execute(
+                "SELECT id, role, text, ts FROM messages WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (user_id, after, limit),
+            ).fetchall()
+        else:
+            rows = self._conn().execute(
+                "SELECT id, role, text, ts FROM messages WHERE user_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (user_id, before if before is not None else 2**63 - 1, limit),
+            ).fetchall()[::-1]
+        return [{"role": r, "text": t, "ts": ts, "seq": i} for i, r, t, ts in rows]
+
+    def export(self, user_id=None, chunk=500):
+        # keyset pagination: one short query per chunk, no cursor held between chunks
+        after = 0
+        where, args = ("user_id = ? AND ", (user_id,)) if user_id is not None else ("", ())
+        while True:
+            rows = self._conn().execute(
+                f"SELECT id, user_id, role, text, ts FROM messages WHERE {where}id > ? ORDER BY id LIMIT ?",
+                (*args, after, chunk),
+            ).fetchall()
+            if not rows:
+                return
+            yield [(u, {"role": r, "text": t, "ts": ts, "seq": i}) for i, u, r, t, ts in rows]
+            after = rows[-1][0]
+
+    def discard(self, user_id, seq):
+        self._conn().execute("DELETE FROM messages WHERE user_id = ? AND id = ?", (user_id, seq))
+
+    def reset(self, user_id):
+        self._conn().execute("DELETE FROM messages WHERE user_id = ?", (user_id,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM messages")
+
+    def __len__(self):
+        (count,) = self._conn().execute("SELECT COUNT(DISTINCT user_id) FROM messages").fetchone()
+        return count
+
+# choose a store via env var
+def make_store() -> ConversationStore:
+    kind = os.getenv("STORE", "memory").lower()
+    max_messages = int(os.getenv("STORE_MAX_MESSAGES", "200"))
+    if kind == "sqlite":
+        return SQLiteStore(os.getenv("STORE_PATH", "weBot.db"), max_messages=max_messages)
+    ttl = float(os.getenv("STORE_TTL", str(24 * 3600)))
+    return MemoryStore(
+        max_messages=max_messages,
+        max_users=int(os.getenv("STORE_MAX_USERS", "10000")),
+        ttl=ttl if ttl > 0 else None,
+    )
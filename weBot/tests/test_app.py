@@ -1,13 +1,14 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
-from app import app, conversations
+from app import app, STORE
 
 client = TestClient(app)
 
 @pytest.fixture(autouse=True)
 def clear_memory():
     """Clear in-memory conversations between tests."""
-    conversations.clear()
+    STORE.clear()
 
 def test_rest_chat_rules_brain():
     """Simple REST test using the fallback RulesBrain."""
@@ -34,3 +35,154 @@ def test_websocket_basic():
         ws.send_text("hello")
         reply = ws.receive_text()
         assert isinstance(reply, str)
+
+def test_websocket_frame_params_are_clamped():
+    from starlette.datastructures import QueryParams
+    from app import frame_settings, WS_FRAME_CHARS, WS_FRAME_MS
+    assert frame_settings(QueryParams("frame_chars=abc&frame_ms=nan")) == (WS_FRAME_CHARS, WS_FRAME_MS / 1000)
+    assert frame_settings(QueryParams("frame_chars=-5&frame_ms=1e9")) == (1, 1.0)
+    # 0 or negative would disable the deadline timer: clamped to the 1 ms minimum
+    assert frame_settings(QueryParams("frame_ms=0"))[1] == frame_settings(QueryParams("frame_ms=-1"))[1] == 0.001
+    with client.websocket_connect("/ws/frames?frame_chars=oops&frame_ms=-1") as ws:
+        ws.send_text("hello")
+        assert ws.receive_text()
+
+def test_stats_endpoint():
+    client.post("/chat", json={"user_id": "s", "message": "hello"})
+    res = client.get("/stats")
+    assert res.status_code == 200
+    assert res.json()["flights"]["started"] >= 1
+
+def test_metrics_endpoint():
+    client.post("/chat", json={"user_id": "m", "message": "hello"})
+    with client.websocket_connect("/ws/m") as ws:
+        ws.send_text("hello")
+        ws.receive_text()
+    body = client.get("/metrics").text
+    assert 'weBot_http_request_duration_seconds_count{route="/chat",method="POST",status="200"}' in body
+    assert 'weBot_stage_seconds_count{stage="store_write"}' in body
+    assert "weBot_brain_tokens_total" in body
+    assert "weBot_ws_active 0" in body
+
+def test_history_cursor_pagination_and_export():
+    for i in range(5):
+        STORE.append("pager", {"role": "user", "text": str(i), "ts": 0})
+    page = client.get("/history/pager?n=2")
+    assert [m["text"] for m in page.json()] == ["3", "4"]
+    assert "x-next-cursor" not in page.headers
+    older = client.get(f"/history/pager?n=2&before={page.headers['x-prev-cursor']}")
+    assert [m["text"] for m in older.json()] == ["1", "2"]
+    newer = client.get(f"/history/pager?n=2&after={older.headers['x-next-cursor']}")
+    assert [m["text"] for m in newer.json()] == ["3", "4"]
+
+    res = client.get("/export/pager")
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert [l["text"] for l in lines] == ["0", "1", "2", "3", "4"] and lines[0]["user_id"] == "pager"
+
+def test_history_cursors_are_readable_cross_origin():
+    STORE.append("cors", {"role": "user", "text": "hi", "ts": 0})
+    res = client.get("/history/cors?n=1", headers={"Origin": "https://ui.example"})
+    exposed = res.headers["access-control-expose-headers"].lower()
+    assert "x-prev-cursor" in exposed and "x-next-cursor" in exposed
+
+def test_chat_batch_fans_out_across_users_in_order(monkeypatch):
+    import asyncio
+    import app as webot
+    from brains import Brain
+
+    class SlowEcho(Brain):
+        active = peak = 0
+        def reply(self, history, user_input):
+            return f"echo {user_input}"
+        def stream_reply(self, history, user_input):
+            yield f"echo {user_input}"
+        async def astream_reply(self, history, user_input):
+            SlowEcho.active += 1
+            SlowEcho.peak = max(SlowEcho.peak, SlowEcho.active)
+            await asyncio.sleep(0.05)
+            SlowEcho.active -= 1
+            yield f"echo {user_input} after {len(history)}"
+
+    monkeypatch.setattr(webot, "BRAIN", SlowEcho())
+    messages = [{"user_id": f"b{i % 4}", "message": f"m{i}"} for i in range(8)]
+    res = client.post("/chat/batch", json={"messages": messages})
+    items = res.json()
+    assert [item["index"] for item in items] == list(range(8))
+    assert items[0]["reply"] == "echo m0 after 1" and items[4]["reply"] == "echo m4 after 3"
+    assert SlowEcho.peak == 4  # one in flight per user, users in parallel
+
+    streamed = client.post("/chat/batch?stream=true", json={"messages": messages[:3]})
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+
+def test_concurrent_identical_questions_do_not_share_other_users_context(monkeypatch):
+    import asyncio
+    import app as webot
+    from brains import Brain
+
+    class EchoHistory(Brain):
+        def reply(self, history, user_input):
+            return ""
+        def stream_reply(self, history, user_input):
+            yield ""
+        async def astream_reply(self, history, user_input):
+            await asyncio.sleep(0.05)
+            yield history[0]["text"]
+
+    monkeypatch.setattr(webot, "BRAIN", EchoHistory())
+    for user in ("alice", "bob"):
+        STORE.append(user, {"role": "user", "text": f"secret={user}", "ts": 0})
+        STORE.append(user, {"role": "user", "text": "thanks", "ts": 0})
+        STORE.append(user, {"role": "bot", "text": "np", "ts": 0})
+        STORE.append(user, {"role": "user", "text": "what is it?", "ts": 0})
+
+    async def both():
+        return await asyncio.gather(*(webot.generate_reply(u, "what is it?") for u in ("alice", "bob")))
+    assert asyncio.run(both()) == ["secret=alice", "secret=bob"]
+
+def test_sqlite_store_calls_run_off_the_event_loop(monkeypatch, tmp_path):
+    import asyncio, app as app_module
+    from store import SQLiteStore
+
+    on_loop = []
+    class RecordingStore(SQLiteStore):
+        def append(self, user_id, message):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return super().append(user_id, message)
+
+    monkeypatch.setattr(app_module, "STORE", RecordingStore(str(tmp_path / "chat.db")))
+    assert client.post("/chat", json={"user_id": "sq", "message": "hello"}).status_code == 200
+    with client.websocket_connect("/ws/sq") as ws:
+        ws.send_text("hello")
+        assert ws.receive_text()
+    assert on_loop and not any(on_loop)
+
+def test_rejected_turns_leave_no_unanswered_message(monkeypatch):
+    import asyncio
+    import app as webot
+    from brains import Brain
+    from fastapi import HTTPException
+    from pool import BrainPool
+
+    class Slow(Brain):
+        def reply(self, history, user_input):
+            return "x"
+        def stream_reply(self, history, user_input):
+            yield "x"
+        async def astream_reply(self, history, user_input):
+            await asyncio.sleep(0.05)
+            yield "x"
+
+    monkeypatch.setattr(webot, "BRAIN", BrainPool(Slow(), max_concurrency=1, max_queue=0))
+
+    async def three():
+        return await asyncio.gather(*(webot.chat_turn("busy", f"m{i}") for i in range(3)), return_exceptions=True)
+    results = asyncio.run(three())
+    assert [getattr(r, "status_code", 200) for r in results] == [200, 503, 503]
+    assert [(m["role"], m["text"]) for m in STORE.get("busy")] == [("user", "m0"), ("bot", "x")]
+    assert [m["text"] for m in STORE.page("busy", 1, after=STORE.get("busy")[0]["seq"])] == ["x"]
@@ -9,3 +9,73 @@ def test_groq_brain(monkeypatch):
     reply = brain.reply([], "Hello Groq!")
     assert isinstance(reply, str)
     assert len(reply) > 0
+
+def test_rules_brain_astream_reply():
+    import asyncio
+    from brains import RulesBrain
+
+    async def collect():
+        return [t async for t in RulesBrain().astream_reply([], "hello")]
+
+    assert "".join(asyncio.run(collect())) == "Hey! How can I help today?"
+
+def test_sync_stream_does_not_block_loop():
+    import asyncio, time
+    from brains import Brain
+
+    class SlowBrain(Brain):
+        def reply(self, history, user_input):
+            return "done"
+        def stream_reply(self, history, user_input):
+            for t in ("a", "b"):
+                time.sleep(0.2)  # blocking I/O
+                yield t
+
+    async def run():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        task = asyncio.create_task(ticker())
+        tokens = [t async for t in SlowBrain().astream_reply([], "x")]
+        task.cancel()
+        return tokens, ticks
+
+    tokens, ticks = asyncio.run(run())
+    assert tokens == ["a", "b"]
+    assert ticks > 10  # loop kept running while the brain blocked
+
+def test_groq_astream_closes_upstream_when_abandoned():
+    import asyncio
+    from types import SimpleNamespace
+    from brains import GroqBrain
+    from context import ContextWindow
+
+    class FakeStream:
+        closed = False
+        async def __aenter__(self):
+            return self
+        async def __aexit__(self, *exc):
+            FakeStream.closed = True
+        async def __aiter__(self):
+            for t in ("a", "b", "c"):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=t))])
+
+    async def create(**kwargs):
+        return FakeStream()
+
+    brain = GroqBrain.__new__(GroqBrain)
+    brain.aclient = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    brain.model, brain.temp, brain.top_p, brain.max_tokens = "m", 0.7, 0.95, 16
+    brain._system, brain.window = [], ContextWindow()
+
+    async def first_token_then_leave():
+        gen = brain.astream_reply([], "hi")
+        token = await gen.__anext__()
+        await gen.aclose()
+        return token
+
+    assert asyncio.run(first_token_then_leave()) == "a"
+    assert FakeStream.closed
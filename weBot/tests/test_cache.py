@@ -0,0 +1,61 @@
+import asyncio
+from brains import Brain, error_reply
+from cache import CachedBrain, TTLCache, cache_key
+
+class CountingBrain(Brain):
+    def __init__(self, text="Hello there, how can I help?"):
+        self.text = text
+        self.calls = 0
+    def reply(self, history, user_input):
+        self.calls += 1
+        return self.text
+
+def test_key_ignores_case_punctuation_and_whitespace():
+    assert cache_key([], "Hello,  there!") == cache_key([], "hello there")
+    prior = [{"role": "bot", "text": "Welcome back", "ts": 0}]
+    assert cache_key(prior, "hi") != cache_key([], "hi")
+
+def test_cached_reply_and_stream_hit():
+    inner = CountingBrain()
+    brain = CachedBrain(inner, chunk_chars=5)
+    assert brain.reply([], "Hi!") == inner.text
+    assert "".join(brain.stream_reply([], "hi")) == inner.text
+    assert len(list(brain.stream_reply([], "hi"))) > 1  # replayed as chunks
+    assert inner.calls == 1
+    assert brain.stats()["hits"] == 2
+
+def test_async_stream_populates_cache():
+    inner = CountingBrain()
+    brain = CachedBrain(inner)
+
+    async def collect():
+        return "".join([t async for t in brain.astream_reply([], "faq")])
+
+    assert asyncio.run(collect()) == inner.text
+    assert asyncio.run(collect()) == inner.text
+    assert inner.calls == 1
+
+def test_errors_and_expired_entries_are_not_served():
+    inner = CountingBrain(error_reply("Groq", TimeoutError()))
+    brain = CachedBrain(inner)
+    brain.reply([], "x"); brain.reply([], "x")
+    assert inner.calls == 2
+    cache = TTLCache(ttl=-1)
+    cache.set("k", "v")
+    assert cache.get("k") is None
+
+def test_prompt_key_uses_the_rolling_digest_of_store_histories():
+    from cache import prompt_key
+    from store import MemoryStore
+    store = MemoryStore(max_messages=3)
+    for text in ("a", "b", "c", "d"):
+        store.append("u", {"role": "user", "text": text, "ts": 0})
+    live = store.context("u")
+    assert prompt_key(live, "q") != prompt_key(live, "r")
+    # untrimmed: the rolling digest equals hashing the history itself
+    other = MemoryStore(max_messages=10)
+    for text in ("a", "b", "c", "d"):
+        other.append("w", {"role": "user", "text": text, "ts": 0})
+    assert prompt_key(other.context("w"), "q") == prompt_key(list(other.context("w")), "q")
+    live.buffer.digest = b"stale"  # proves the buffer digest is used, not a re-walk
+    assert prompt_key(live, "q") != prompt_key(list(live), "q")
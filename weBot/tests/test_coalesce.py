@@ -0,0 +1,51 @@
+import asyncio
+from coalesce import SingleFlight
+
+def slow_stream(calls, tokens=("a", "b", "c"), fail=False):
+    async def gen():
+        calls.append(1)
+        for t in tokens:
+            await asyncio.sleep(0.01)
+            yield t
+        if fail:
+            raise RuntimeError("upstream down")
+    return gen
+
+def test_identical_requests_share_one_upstream_call():
+    calls = []
+
+    async def run():
+        flights = SingleFlight()
+        async def one():
+            return "".join([t async for t in flights.stream("k", slow_stream(calls))])
+        results = await asyncio.gather(*(one() for _ in range(20)))
+        return flights, results
+
+    flights, results = asyncio.run(run())
+    assert results == ["abc"] * 20
+    assert len(calls) == 1 and flights.joined == 19 and len(flights) == 0
+
+def test_errors_fan_out_to_every_subscriber():
+    calls = []
+
+    async def run():
+        flights = SingleFlight()
+        async def one():
+            return [t async for t in flights.stream("k", slow_stream(calls, fail=True))]
+        return await asyncio.gather(one(), one(), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+    assert len(calls) == 1
+
+def test_last_subscriber_leaving_cancels_upstream():
+    calls = []
+
+    async def run():
+        flights = SingleFlight()
+        agen = flights.stream("k", slow_stream(calls, tokens="x" * 100))
+        assert await agen.__anext__() == "x"
+        await agen.aclose()
+        await asyncio.sleep(0.05)
+        return flights
+
+    assert len(asyncio.run(run())) == 0
@@ -0,0 +1,47 @@
+from context import ContextWindow, estimate_tokens
+
+def turns(n, text="word " * 20):
+    return [{"role": "user" if i % 2 == 0 else "bot", "text": f"{i}. {text}", "ts": 0} for i in range(n)]
+
+def test_window_keeps_most_recent_turns_within_budget():
+    history = turns(50)
+    window = ContextWindow(max_tokens=200)
+    dropped, kept = window.select(history)
+    assert dropped + kept == history
+    assert kept[-1] is history[-1]
+    assert sum(estimate_tokens(m["text"]) for m in kept) <= 200
+    assert len(kept) < 50
+
+def test_window_always_keeps_latest_message():
+    history = turns(3, text="x" * 4000)
+    dropped, kept = ContextWindow(max_tokens=10).select(history)
+    assert kept == history[-1:]
+
+def test_summary_folds_dropped_turns():
+    history = turns(40)
+    window = ContextWindow(max_tokens=300, summary_tokens=100)
+    dropped, kept = window.select(history)
+    summary = window.summarize(dropped)
+    assert summary.startswith("Summary of earlier conversation:")
+    assert estimate_tokens(summary) <= 100 + 10
+    assert f"{len(dropped) - 1}." in summary  # newest dropped turn is folded in first
+
+def test_buffer_window_matches_plain_history():
+    from store import MemoryStore
+    store = MemoryStore(max_messages=30)
+    for m in turns(45):
+        store.append("u", m)
+    window = ContextWindow(max_tokens=200, summary_tokens=60)
+    plain = window.build(store.get("u"))
+    incremental = window.build(store.context("u"))
+    assert incremental == plain
+    assert len(store.context("u").buffer) == 30
+
+def test_buffer_memory_is_bounded_by_max_len():
+    from context import MessageBuffer
+    buffer = MessageBuffer(max_len=20)
+    for m in turns(500):
+        buffer.append(m)
+    assert len(buffer) == 20
+    assert len(buffer._msgs) <= 40 and len(buffer._cum) <= 41
+    assert buffer.window(10**6)[1][-1]["content"] == turns(500)[-1]["text"]
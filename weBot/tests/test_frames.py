@@ -0,0 +1,29 @@
+import asyncio
+from frames import FrameCoalescer
+
+def run_stream(tokens, delay, **kw):
+    sent = []
+
+    async def send(text):
+        sent.append(text)
+
+    async def run():
+        frames = FrameCoalescer(send, **kw)
+        for t in tokens:
+            await frames.push(t)
+            await asyncio.sleep(delay)
+        await frames.flush()
+        return frames.stats()
+
+    return sent, asyncio.run(run())
+
+def test_fast_stream_is_batched_by_size():
+    sent, stats = run_stream(["abcd"] * 40, 0, max_chars=64, max_latency=1.0)
+    assert "".join(sent) == "abcd" * 40
+    assert all(len(f) >= 64 for f in sent[:-1])
+    assert stats["frames"] == len(sent) == 3
+
+def test_slow_stream_is_flushed_by_deadline():
+    sent, stats = run_stream(["a", "b", "c"], 0.05, max_chars=64, max_latency=0.01)
+    assert sent == ["a", "b", "c"]  # nothing waits for the size threshold
+    assert stats["ttfb_ms"] < 40
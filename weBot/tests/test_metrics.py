@@ -0,0 +1,23 @@
+from metrics import Histogram, Counter, Gauge, Trace
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("lat_seconds", "latency", ["route"], buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.7, 5.0):
+        h.observe(v, "/chat")
+    lines = "\n".join(h.render())
+    assert 'lat_seconds_bucket{route="/chat",le="0.1"} 1' in lines
+    assert 'lat_seconds_bucket{route="/chat",le="1.0"} 3' in lines
+    assert 'lat_seconds_bucket{route="/chat",le="+Inf"} 4' in lines
+    assert 'lat_seconds_count{route="/chat"} 4' in lines
+
+def test_counter_and_callback_gauge():
+    c = Counter("tokens_total", "tokens", ["brain"])
+    c.inc(3, "rules"); c.inc(2, "rules")
+    assert 'tokens_total{brain="rules"} 5.0' in c.render()
+    g = Gauge("size", "size", fn=lambda: 42)
+    assert "size 42" in g.render()
+
+def test_trace_accumulates_stages():
+    t = Trace("/chat")
+    t.add("store_write", 0.001); t.add("store_write", 0.002)
+    assert abs(t.stages["store_write"] - 0.003) < 1e-9
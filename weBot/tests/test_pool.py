@@ -0,0 +1,66 @@
+import asyncio, time
+from brains import Brain
+from pool import BrainPool, PoolFull
+
+class RateLimited(Exception):
+    status_code = 429
+    class response:
+        status_code = 429
+        headers = {"retry-after": "0.01"}
+
+class FlakyBrain(Brain):
+    def __init__(self, failures=0, delay=0.0, exc=RateLimited):
+        self.failures, self.delay, self.exc = failures, delay, exc
+        self.calls = 0
+    def reply(self, history, user_input):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise self.exc()
+        return "ok"
+    async def astream_reply(self, history, user_input):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay if call == 1 else 0)
+        if call <= self.failures:
+            raise self.exc()
+        yield "ok"
+
+def test_retries_honor_retry_after():
+    inner = FlakyBrain(failures=2)
+    pool = BrainPool(inner, retries=3)
+    assert pool.reply([], "hi") == "ok"
+    assert inner.calls == 3 and pool.stats()["retried"] == 2
+
+def test_non_retryable_errors_are_not_retried():
+    class BadRequest(Exception):
+        status_code = 400
+    inner = FlakyBrain(failures=5, exc=BadRequest)
+    pool = BrainPool(inner, retries=3)
+    assert "error" in pool.reply([], "hi")
+    assert inner.calls == 1
+
+def test_full_queue_rejects_fast():
+    async def run():
+        pool = BrainPool(FlakyBrain(delay=0.1), max_concurrency=1, max_queue=1)
+        async def one():
+            return [t async for t in pool.astream_reply([], "hi")]
+        results = await asyncio.gather(*(one() for _ in range(3)), return_exceptions=True)
+        return pool, results
+
+    pool, results = asyncio.run(run())
+    assert sum(isinstance(r, PoolFull) for r in results) == 1
+    stats = pool.stats()
+    assert stats["rejected"] == 1 and stats["max_wait_ms"] >= 50
+
+def test_hedged_request_wins_over_slow_primary():
+    async def run():
+        inner = FlakyBrain(delay=1.0)  # first call is slow, the hedge is fast
+        pool = BrainPool(inner, hedge_after=0.02)
+        t0 = time.perf_counter()
+        tokens = [t async for t in pool.astream_reply([], "hi")]
+        return tokens, time.perf_counter() - t0, pool
+
+    tokens, elapsed, pool = asyncio.run(run())
+    assert tokens == ["ok"] and elapsed < 0.5
+    assert pool.stats()["hedged"] == 1
@@ -0,0 +1,69 @@
+import asyncio
+from brains import Brain, RulesBrain
+from router import RouterBrain
+
+class StubBrain(Brain):
+    def __init__(self, text="ok", fail=False, delay=0.0):
+        self.text, self.fail, self.delay = text, fail, delay
+        self.calls = 0
+    def reply(self, history, user_input):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("down")
+        return self.text
+    async def astream_reply(self, history, user_input):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("down")
+        for t in self.text:
+            yield t
+
+def collect(brain, text="hi"):
+    async def run():
+        return "".join([t async for t in brain.astream_reply([], text)])
+    return asyncio.run(run())
+
+def test_fails_over_before_first_token():
+    broken, healthy = StubBrain(fail=True), StubBrain("fine")
+    router = RouterBrain([("broken", broken), ("healthy", healthy)], fallback=RulesBrain())
+    assert collect(router) == "fine"
+    assert router.stats()["broken"]["error_rate"] > 0
+
+def test_breaker_opens_and_fallback_answers():
+    broken = StubBrain(fail=True)
+    router = RouterBrain([("broken", broken)], fallback=RulesBrain())
+    for _ in range(5):
+        assert "rules fallback" in router.reply([], "xyz")
+    assert broken.calls == 3  # breaker opened after 3 consecutive failures
+    assert router.stats()["broken"]["circuit"] == "open"
+
+def test_backend_that_never_succeeded_is_not_ranked_first():
+    broken, healthy = StubBrain(fail=True), StubBrain("fine")
+    router = RouterBrain([("broken", broken), ("healthy", healthy)], fallback=RulesBrain())
+    assert [collect(router) for _ in range(3)] == ["fine"] * 3
+    assert broken.calls == 1  # probed once, then ranked behind the healthy backend
+    assert router.stats()["broken"]["circuit"] == "closed"
+
+def test_prefers_lower_latency_backend():
+    slow, fast = StubBrain("slow", delay=0.05), StubBrain("fast", delay=0.0)
+    router = RouterBrain([("slow", slow), ("fast", fast)])
+    collect(router); collect(router)  # probe both
+    assert [collect(router) for _ in range(3)] == ["fast"] * 3
+
+def test_recovering_backend_ranked_second_still_gets_its_trial():
+    primary, backup = StubBrain("primary"), StubBrain("backup", delay=0.02)
+    router = RouterBrain([("primary", primary), ("backup", backup)], fallback=RulesBrain())
+    collect(router); collect(router)  # measure both: backup ranks second
+    b = router.backends[1]
+    b.breaker.reset_after = 0.01
+    for _ in range(3):
+        b.breaker.failure()
+    assert b.breaker.state == "open"
+    import time; time.sleep(0.02)
+    for _ in range(5):  # backup is eligible but never called while primary is healthy
+        assert collect(router) == "primary"
+    assert b.breaker.state == "open"
+    primary.fail = True
+    assert collect(router) == "backup"
+    assert b.breaker.state == "closed"
@@ -0,0 +1,36 @@
+import gzip
+from fastapi.testclient import TestClient
+from app import app
+from static import Asset, choose_encoding, etag_matches
+
+client = TestClient(app)
+
+def test_index_is_gzipped_with_etag_and_revalidated():
+    res = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.headers["cache-control"] == "no-cache"
+    assert res.headers["vary"] == "Accept-Encoding"
+    assert "<html" in res.text.lower()  # decoded by the client
+
+    again = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": res.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
+
+def test_identity_when_compression_not_accepted():
+    res = client.get("/index.html", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in res.headers
+    assert int(res.headers["content-length"]) == len(res.content)
+
+def test_missing_asset_and_head():
+    assert client.get("/nope.js").status_code == 404
+    res = client.head("/")
+    assert res.status_code == 200 and res.content == b""
+
+def test_encoding_negotiation():
+    asset = Asset(b"x" * 1000, "text/plain")
+    asset.variants["br"] = b"tiny"
+    assert choose_encoding(asset, "gzip, br") == "br"
+    assert choose_encoding(asset, "gzip, br;q=0") == "gzip"
+    assert choose_encoding(asset, "") == "identity"
+    assert gzip.decompress(asset.variants["gzip"]) == b"x" * 1000
+    assert etag_matches('W/"abc", "def"', '"def"') and not etag_matches('"abc"', '"abcd"')
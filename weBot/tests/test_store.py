@@ -0,0 +1,81 @@
+import time
+from store import MemoryStore, SQLiteStore
+
+def msg(text, role="user"):
+    return {"role": role, "text": text, "ts": time.time()}
+
+def test_memory_store_caps_messages_per_user():
+    store = MemoryStore(max_messages=3)
+    for i in range(5):
+        store.append("u", msg(str(i)))
+    assert [m["text"] for m in store.get("u")] == ["2", "3", "4"]
+    assert [m["text"] for m in store.get("u", 2)] == ["3", "4"]
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryStore(max_users=2)
+    store.append("a", msg("1"))
+    store.append("b", msg("1"))
+    store.get("a")  # touch a, so b is now the LRU entry
+    store.append("c", msg("1"))
+    assert len(store) == 2
+    assert store.get("b") == []
+    assert store.get("a") and store.get("c")
+
+def test_memory_store_evicts_idle_conversations():
+    store = MemoryStore(ttl=0.05)
+    store.append("idle", msg("1"))
+    time.sleep(0.1)
+    store.append("active", msg("1"))
+    assert store.get("idle") == []
+    assert len(store) == 1
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "chat.db")
+    a, b = SQLiteStore(path, max_messages=2), SQLiteStore(path, max_messages=2)
+    a.append("u", msg("hi"))
+    b.append("u", msg("hello", role="bot"))
+    assert a.append("u", msg("again")) == 2
+    assert [m["text"] for m in b.get("u")] == ["hello", "again"]
+    b.reset("u")
+    assert a.get("u") == [] and len(a) == 0
+
+def test_pages_and_export_agree_across_stores(tmp_path):
+    for store in (MemoryStore(max_messages=5), SQLiteStore(str(tmp_path / "p.db"), max_messages=5)):
+        for i in range(7):
+            store.append("u", msg(str(i)))
+        store.append("v", msg("other"))
+        seqs = [m["seq"] for m in store.get("u")]
+        assert [m["text"] for m in store.page("u", 2)] == ["5", "6"]
+        assert [m["text"] for m in store.page("u", 2, before=seqs[3])] == ["3", "4"]
+        assert [m["text"] for m in store.page("u", 10, before=seqs[0])] == []
+        assert [m["text"] for m in store.page("u", 2, after=seqs[0])] == ["3", "4"]
+        chunks = list(store.export(chunk=2))
+        assert max(len(c) for c in chunks) == 2
+        exported = [(u, m["text"]) for c in chunks for u, m in c]
+        assert sorted(exported) == [("u", t) for t in "23456"] + [("v", "other")]
+        assert [m["text"] for c in store.export("v") for _, m in c] == ["other"]
+
+def test_discard_leaves_a_gap_that_cursors_skip(tmp_path):
+    for store in (MemoryStore(max_messages=5), SQLiteStore(str(tmp_path / "d.db"), max_messages=5)):
+        for i in range(4):
+            m = msg(str(i))
+            store.append("u", m)
+            if i == 1:
+                dropped = m["seq"]
+        store.discard("u", dropped)
+        seqs = [m["seq"] for m in store.get("u")]
+        assert [m["text"] for m in store.get("u")] == ["0", "2", "3"]
+        assert [m["text"] for m in store.page("u", 2, after=seqs[0])] == ["2", "3"]
+        assert [m["text"] for m in store.page("u", 5, before=seqs[2])] == ["0", "2"]
+
+def test_seq_keeps_increasing_across_reset(tmp_path):
+    for store in (MemoryStore(), SQLiteStore(str(tmp_path / "r.db"))):
+        for i in range(3):
+            store.append("u", msg(str(i)))
+        cursor = store.get("u")[-1]["seq"]
+        store.reset("u")
+        assert store.get("u") == []
+        store.append("u", msg("fresh"))
+        assert store.get("u")[0]["seq"] > cursor
+        assert store.page("u", 5, before=cursor) == []
+        assert [m["text"] for m in store.page("u", 5, after=cursor)] == ["fresh"]